@@ -4,19 +4,20 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flasgger import Swagger
 from datetime import datetime
-from sqlalchemy import text, func, distinct
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from src.db.db import SessionLocal
-    from src.db.models import Job, JobsApplied
+    from src.db.db import SessionLocal, pool_status
+    from src.db.models import DailyStats
+    from src.db.rollup import totals
 except ImportError:
     # Fallback for direct execution
-    from db.db import SessionLocal
-    from db.models import Job, JobsApplied
+    from db.db import SessionLocal, pool_status
+    from db.models import DailyStats
+    from db.rollup import totals
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -79,46 +80,15 @@ def get_job_stats():
     session = get_db_session()
     
     try:
-        # Total Jobs Found
-        total_jobs = session.query(Job).count()
-        
-        # Total Jobs Applied
-        total_applied = session.query(JobsApplied).count()
-        
-        # Debug: First let's check if there are any jobs with applied_at not null
-        test_query = text("SELECT COUNT(*) FROM jobs WHERE applied_at IS NOT NULL")
-        test_result = session.execute(test_query).scalar()
-        print(f"Jobs with applied_at not null: {test_result}", flush=True)
-        
-        # Try the email query with explicit connection
-        try:
-            email_query = text("""
-                SELECT COUNT(DISTINCT TRIM(email))
-                FROM jobs
-                CROSS JOIN LATERAL unnest(string_to_array(contact_email, ',')) AS email
-                WHERE applied_at IS NOT NULL
-            """)
-            
-            email_result = session.execute(email_query)
-            total_unique_emails = email_result.scalar()
-            print(f"Email query result: {total_unique_emails}", flush=True)
-            
-            if total_unique_emails is None:
-                total_unique_emails = 0
-            else:
-                total_unique_emails = int(total_unique_emails)
-                
-        except Exception as email_error:
-            print(f"Email query error: {str(email_error)}", flush=True)
-            total_unique_emails = 0
+        # Sums over the daily_stats rollup (one row per day), not counts over the job tables
+        rollup = totals(session)
         
         stats = {
-            "total_jobs_found": total_jobs,
-            "total_jobs_applied": total_applied,
-            "total_unique_emails_sent": total_unique_emails
+            "total_jobs_found": rollup["jobs_found"],
+            "total_jobs_applied": rollup["applications"],
+            "total_unique_emails_sent": rollup["recipients"]
         }
         
-        print(f"Final stats: {stats}", flush=True)
         return jsonify(stats)
     
     except Exception as e:
@@ -178,10 +148,10 @@ def get_jobs_applied_per_day():
     session = get_db_session()
     
     try:
-        # Count jobs applied on the specific date
-        jobs_applied_count = session.query(JobsApplied).filter(
-            func.date(JobsApplied.applied_at) == target_date
-        ).count()
+        # Count jobs applied on the specific date, from its daily_stats row
+        jobs_applied_count = session.query(DailyStats.applications).filter(
+            DailyStats.day == target_date
+        ).scalar() or 0
         
         return jsonify({
             "date": date_str,
@@ -246,20 +216,20 @@ def get_daily_applications_summary():
     session = get_db_session()
     
     try:
-        # Base query to get daily counts
+        # Base query to get daily counts: one daily_stats row per day with applications
         query = session.query(
-            func.date(JobsApplied.applied_at).label('application_date'),
-            func.count(JobsApplied.id).label('applications_count')
-        ).group_by('application_date').order_by('application_date')
+            DailyStats.day.label('application_date'),
+            DailyStats.applications.label('applications_count')
+        ).filter(DailyStats.applications > 0).order_by(DailyStats.day)
         
         # Apply date filters if provided
         if start_date_str:
             start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(func.date(JobsApplied.applied_at) >= start_date)
+            query = query.filter(DailyStats.day >= start_date)
         
         if end_date_str:
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(func.date(JobsApplied.applied_at) <= end_date)
+            query = query.filter(DailyStats.day <= end_date)
         
         results = query.all()
         
@@ -277,6 +247,44 @@ def get_daily_applications_summary():
     finally:
         session.close()
 
+@app.route('/api/db/pool', methods=['GET'])
+def get_pool_status():
+    """
+    Get database connection pool status
+    ---
+    tags:
+      - Statistics
+    responses:
+      200:
+        description: Returns pool occupancy and checkout wait counters
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                size:
+                  type: integer
+                  example: 5
+                checked_out:
+                  type: integer
+                  example: 2
+                waited:
+                  type: integer
+                  example: 0
+                timeouts:
+                  type: integer
+                  example: 0
+                wait_ms_max:
+                  type: number
+                  example: 1.5
+      500:
+        description: Internal server error
+    """
+    try:
+        return jsonify(pool_status())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/')
 def index():
     """Redirect to Swagger UI"""
@@ -324,6 +332,7 @@ def index():
                 <li><strong>GET /api/stats</strong> - Get overall job application statistics</li>
                 <li><strong>GET /api/stats/applied-per-day?date=YYYY-MM-DD</strong> - Get jobs applied count for a specific date</li>
                 <li><strong>GET /api/stats/daily-applications?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD</strong> - Get daily application counts for a date range</li>
+                <li><strong>GET /api/db/pool</strong> - Get database connection pool status</li>
             </ul>
         </div>
     </body>
@@ -4,12 +4,19 @@ from typing import Optional
 from unidecode import unidecode
 import fitz  # PyMuPDF
 
-from ..db.db import SessionLocal
+from sqlalchemy import select
+
+from ..db.db import SessionLocal, get_session
 from ..db.models import Job, Company
-from ..llm.ollama_client import generate_cover_letter, generate_email_body, generate_cover_letter_and_email_body
-from src.match.rank import score_job
-import time
-from time import sleep
+from ..llm.ollama_client import (generate_cover_letter, generate_email_body, generate_cover_letter_and_email_body,
+                                 generate_cover_letters_batch, pack_batches)
+from ..llm.backends import get_backend
+from ..llm.throttle import AdaptiveLimiter
+from ..llm import cache as llm_cache
+from ..llm.metrics import METRICS
+from src.match.rank import score_job, ranked_jobs_query, refresh_skill_index
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 def _extract_resume_text(pdf_path: str) -> str:
     doc = fitz.open(pdf_path)
@@ -20,6 +27,42 @@ def _trim_text(s: str, max_chars: int = 12000) -> str:
     s = s.strip()
     return s if len(s) <= max_chars else s[:max_chars] + "\n...[trimmed]"
 
+def _load_jd_texts(job_ids) -> dict:
+    """job id -> jd_text for the jobs about to be drafted (jd_text is deferred on Job), one query per 1000."""
+    job_ids = list(job_ids)
+    texts = {}
+    with get_session() as s:
+        for start in range(0, len(job_ids), 1000):
+            q = select(Job.id, Job.jd_text).where(Job.id.in_(job_ids[start:start + 1000]))
+            texts.update({job_id: jd or "" for job_id, jd in s.execute(q)})
+    return texts
+
+def _select_ranked_sql(s, args, resume_skills):
+    """
+    --top-n / --batch / --all-jobs with scoring, ordering and slicing done in the database.
+    Only the drafted slice is returned, with jd_text/raw_json left unloaded.
+    """
+    refresh_skill_index(s)
+    if args.batch:
+        batch_num, total_batches = map(int, args.batch.split('/'))
+        print(f"Processing batch {batch_num} of {total_batches}")
+        q = ranked_jobs_query(s, resume_skills, unapplied_only=True)
+
+        total_jobs = q.count()
+        jobs_per_batch = total_jobs // total_batches
+        start_idx = (batch_num - 1) * jobs_per_batch
+        end_idx = start_idx + jobs_per_batch if batch_num < total_batches else total_jobs
+
+        rows = q.offset(start_idx).limit(end_idx - start_idx).all()
+        print(f"Batch {batch_num}: processing jobs {start_idx + 1} to {end_idx} ({len(rows)} jobs)")
+    elif args.all_jobs:
+        print("Processing all jobs")
+        rows = ranked_jobs_query(s, resume_skills, unapplied_only=True).all()
+    else:
+        print(f"Processing top {args.top_n} jobs")
+        rows = ranked_jobs_query(s, resume_skills).limit(args.top_n).all()
+    return [(job, comp) for job, comp, _ in rows]
+
 def _safe_name(s: str) -> str:
     return re.sub(r"[^\w\-]+", "_", s).strip("_")
 
@@ -63,8 +106,15 @@ def write_md(outdir: str, job, company: str, result, model_name: str) -> str:
 
 
             """
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(md)
+    # write to a hidden temp file and rename, so a crash or a parallel reader never sees half a draft
+    fd, tmp = tempfile.mkstemp(dir=outdir, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(md)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
     return path
 
 def main():
@@ -80,7 +130,20 @@ def main():
                     help="JSON resume skills profile (for ranking)")
     ap.add_argument("--model", type=str, default="llama3:8b")
     ap.add_argument("--outdir", type=str, default="data/drafts")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Max concurrent LLM requests (adapts down on slow responses/errors; "
+                         "at most LLM_BACKEND_CONCURRENCY run at once)")
+    ap.add_argument("--no-llm-cache", action="store_true",
+                    help="Always call the model instead of reusing cached responses")
+    ap.add_argument("--sql-rank", action="store_true",
+                    help="Rank and slice in the database (flat memory; JD loaded only for drafted jobs)")
+    ap.add_argument("--llm-batch-size", type=int, default=1,
+                    help="Draft up to N jobs per LLM request (packed within LLM_BATCH_TOKEN_BUDGET)")
+    ap.add_argument("--stream", action="store_true",
+                    help="Stream LLM output and abort early on invalid or over-length drafts")
     args = ap.parse_args()
+    if args.no_llm_cache:
+        llm_cache.set_enabled(False)
 
     # Load resume text (for LLM letter generation)
     resume_text = _extract_resume_text(args.resume_pdf)
@@ -94,6 +157,9 @@ def main():
         resume_skills = {k: float(v) for k, v in profile.get("skills", {}).items()}
 
     s = SessionLocal()
+    if (args.top_n or args.all_jobs or args.batch) and not args.sql_rank:
+        # index stale rows in batches first; score_job would otherwise load the deferred jd_text one job at a time
+        refresh_skill_index(s)
     
     if args.job_id:
         results = (
@@ -103,6 +169,8 @@ def main():
              .filter(Job.applied_at.is_(None)) 
              .all()
         )
+    elif args.sql_rank:
+        results = _select_ranked_sql(s, args, resume_skills)
     elif args.batch:
         # Parse batch argument (e.g., "1/4", "2/4")
         batch_num, total_batches = map(int, args.batch.split('/'))
@@ -160,52 +228,75 @@ def main():
         scored.sort(key=lambda x: x[0], reverse=True)
         results = [(job, comp) for _, job, comp in scored[: args.top_n]]
 
+    s.commit()  # persist any skill index entries built lazily while scoring
     s.close()
 
     if not results:
         raise SystemExit("No jobs found.")
 
     print(f"Processing {len(results)} jobs...")
-    
-    # Loop over jobs
-    for i, (job, comp) in enumerate(results, 1):
-        print(f"Processing job {i}/{len(results)}: {comp.name} - {job.title}")
-        #print(f"\nEmail CONTACTTTTTTTTTTTT: {job.contact_email}\n")
-        is_file_existing = False
-        fname = f"{job.id}_{_safe_name(comp.name)}_{_safe_name(job.title or 'role')}_{dt.date.today().isoformat()}.md"
-        path = os.path.join(args.outdir, fname)
 
-        #print(f"[PATH - {i}/{len(results)}] {path} ")
-        # Check if any file exists that starts with {job.id}_
+    # Skip jobs that already have a draft on disk
+    pending = []
+    for i, (job, comp) in enumerate(results, 1):
         pattern = os.path.join(args.outdir, f"{job.id}_*")
         matching_files = glob.glob(pattern)
-        
-        # If any files match the pattern, skip this job
         if matching_files:
             print(f"[draft {i}/{len(results)}] Skipping -> Found existing files for job {job.id}: {[os.path.basename(f) for f in matching_files]}")
             continue
+        pending.append((i, job, comp))
+    jd_texts = _load_jd_texts(job.id for _, job, _ in pending)
 
-        jd_text = _trim_text(job.jd_text or "", max_chars=12000)
-        
+    # Concurrency adapts to observed LLM latency/errors instead of sleeping between jobs
+    backend_slots = get_backend().max_concurrency
+    if args.workers > backend_slots:
+        print(f"[draft] --workers {args.workers} exceeds LLM_BACKEND_CONCURRENCY={backend_slots}; "
+              f"only {backend_slots} requests will be in flight")
+    limiter = AdaptiveLimiter(max_limit=min(args.workers, backend_slots))
+
+    def draft(i, job, comp):
+        print(f"Processing job {i}/{len(results)}: {comp.name} - {job.title}")
         try:
-            result = generate_cover_letter_and_email_body(  #generate_email_body(  #generate_cover_letter
-                company=comp.name,
-                title=job.title or "",
-                jd_text=jd_text,
-                resume_text=resume_text,
-                model=args.model,
-            )
-            
+            jd_text = _trim_text(jd_texts.get(job.id, ""), max_chars=12000)
+            with limiter.slot():
+                result = generate_cover_letter_and_email_body(  #generate_email_body(  #generate_cover_letter
+                    company=comp.name,
+                    title=job.title or "",
+                    jd_text=jd_text,
+                    resume_text=resume_text,
+                    model=args.model,
+                    stream=args.stream,
+                )
             out_path = write_md(args.outdir, job, comp.name, result, args.model)
             print(f"[draft {i}/{len(results)}] Saved -> {out_path}")
-            
-            # Add delay between requests to avoid overwhelming the LLM
-            if i < len(results):
-                sleep(10)
-                
         except Exception as e:
             print(f"Error processing job {job.id}: {e}")
-            continue
+
+    def draft_batch(items):
+        jobs = [(comp.name, job.title or "", _trim_text(jd_texts.get(job.id, ""), max_chars=12000)) for _, job, comp in items]
+        print(f"Processing jobs {', '.join(str(i) for i, _, _ in items)}/{len(results)} in one LLM request")
+        try:
+            with limiter.slot():
+                outs = generate_cover_letters_batch(jobs, resume_text, model=args.model)
+        except Exception as e:
+            print(f"Error processing batch {[job.id for _, job, _ in items]}: {e}")
+            return
+        for (i, job, comp), result in zip(items, outs):
+            try:
+                out_path = write_md(args.outdir, job, comp.name, result, args.model)
+                print(f"[draft {i}/{len(results)}] Saved -> {out_path}")
+            except Exception as e:
+                print(f"Error processing job {job.id}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="draft") as pool:
+        if args.llm_batch_size > 1:
+            groups = pack_batches([jd_texts.get(job.id, "") for _, job, _ in pending], args.llm_batch_size)
+            futures = [pool.submit(draft_batch, [pending[k] for k in group]) for group in groups]
+        else:
+            futures = [pool.submit(draft, i, job, comp) for i, job, comp in pending]
+        for fut in futures:
+            fut.result()
+    METRICS.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,20 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() not in ("0", "false", "no", "off")
+
+
+# Database
+DB_URL = os.getenv("DB_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))                        # connections kept open
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))                 # extra connections under load
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))               # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))               # seconds before a connection is replaced
+DB_POOL_PRE_PING = _flag("DB_POOL_PRE_PING", "1")                         # test connections on checkout
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # Postgres only; 0 = none
+DB_POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "200"))   # log checkouts slower than this
+DB_AUTO_MIGRATE = _flag("DB_AUTO_MIGRATE", "1")                           # apply pending schema migrations on first connect
@@ -1,15 +1,16 @@
 # Core logic
 
-import subprocess
 import json
 from typing import Dict
 from pathlib import Path
 
-def query_llama3(prompt: str) -> str:
-    """Run Ollama with Llama3 and return output."""
-    cmd = ["ollama", "run", "llama3", prompt]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return result.stdout.strip()
+from ..llm.backends import get_backend
+from .prompts import ANALYSIS_PROMPT, COVER_LETTER_PROMPT
+
+def query_llama3(prompt: str, model: str = "llama3") -> str:
+    """Ask Llama3 through the shared LLM backend (pooled HTTP, no process per prompt)."""
+    resp = get_backend().chat(model=model, messages=[{"role": "user", "content": prompt}])
+    return resp.message.content.strip()
 
 def generate_cover_data(
     company: str,
@@ -0,0 +1,93 @@
+"""
+job_contacts: one row per recipient address of a job, the full list behind the
+comma-joined (and length-capped) jobs.contact_email. The table comes from
+migration 0004 (python -m src.db.migrations); until it has run, the writers here
+do nothing and emails_by_job returns {}, so callers fall back to contact_email.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select
+
+from .db import table_ready
+from .models import Job, JobContact
+from .upsert import _insert
+
+CONTACT_EMAIL_MAX = Job.__table__.c.contact_email.type.length  # 255
+
+
+def contacts_ready(session) -> bool:
+    """Whether the session's database has job_contacts yet; warns once per database when not."""
+    # session.connection() sees a table created earlier in this same transaction
+    return table_ready(session.connection(), JobContact.__tablename__,
+                       "[contacts] job_contacts table missing; run `python -m src.db.migrations` "
+                       "(using jobs.contact_email until then)")
+
+
+def split_emails(emails: Optional[str]) -> List[str]:
+    """Addresses in a comma-separated contact_email string, stripped and lower-cased, in order."""
+    seen = {}
+    for email in (emails or "").split(","):
+        email = email.strip().lower()
+        if "@" in email:
+            seen.setdefault(email, None)
+    return list(seen)
+
+
+def fit_contact_email(emails: Optional[str]) -> Optional[str]:
+    """
+    The leading addresses of a comma-separated `emails` that fit jobs.contact_email.
+    The full list belongs in job_contacts; the column is a capped summary of it.
+    """
+    if emails is None or len(emails) <= CONTACT_EMAIL_MAX:
+        return emails
+    kept = []
+    for email in (e.strip() for e in emails.split(",")):
+        if not email:
+            continue
+        if len(",".join(kept + [email])) > CONTACT_EMAIL_MAX:
+            break
+        kept.append(email)
+    return ",".join(kept) or None
+
+
+def contact_rows(job_id: int, emails: Iterable[str], source: str) -> List[dict]:
+    """job_contacts rows for `emails` (already split) of one job."""
+    return [{"job_id": job_id, "email": e, "domain": e.rsplit("@", 1)[1], "source": source} for e in emails]
+
+
+def add_contacts(session, rows: List[dict], batch_size: int = 1000) -> int:
+    """Insert contact rows, ignoring (job_id, email) pairs already stored. Returns rows inserted."""
+    if not rows or not contacts_ready(session):
+        return 0
+    added = 0
+    table = JobContact.__table__
+    for start in range(0, len(rows), batch_size):
+        stmt = _insert(session, table).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_nothing(index_elements=["job_id", "email"]).returning(table.c.id)
+        added += len(session.execute(stmt).all())
+    return added
+
+
+def replace_contacts(session, job_ids: Iterable[int], rows: List[dict]) -> int:
+    """Make `rows` the only contacts of `job_ids` (for postings re-ingested with new text)."""
+    job_ids = list(job_ids)
+    if not contacts_ready(session):
+        return 0
+    if job_ids:
+        session.execute(delete(JobContact).where(JobContact.job_id.in_(job_ids)))
+    return add_contacts(session, rows)
+
+
+def emails_by_job(session, job_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """job id -> its contact addresses, one query per 1000 jobs."""
+    out: Dict[int, List[str]] = {}
+    job_ids = list(job_ids)
+    if not job_ids or not contacts_ready(session):
+        return out
+    for start in range(0, len(job_ids), 1000):
+        q = (select(JobContact.job_id, JobContact.email)
+             .where(JobContact.job_id.in_(job_ids[start:start + 1000]))
+             .order_by(JobContact.job_id, JobContact.id))
+        for job_id, email in session.execute(q):
+            out.setdefault(job_id, []).append(email)
+    return out
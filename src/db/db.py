@@ -1,16 +1,175 @@
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import create_engine, exc, inspect
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from .models import Base
 from contextlib import contextmanager
+from ..config import settings
+
+
+@dataclass
+class PoolMetrics:
+    """Checkout counters for the engine's connection pool (see pool_status())."""
+    checkouts: int = 0
+    waited: int = 0           # checkouts that had to wait for a connection
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    timeouts: int = 0
+
+
+POOL_METRICS = PoolMetrics()
+_metrics_lock = threading.Lock()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times every checkout and warns instead of blocking silently when it runs dry."""
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, timeout: float = 30.0, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, timeout=timeout, **kw)
+        # kept here rather than read back from QueuePool's private attributes; -1 = no overflow cap
+        self.overflow_limit = -1 if pool_size == 0 else max_overflow
+        self.checkout_timeout = timeout
+
+    def _do_get(self):
+        exhausted = self.overflow_limit >= 0 and self.checkedout() >= self.size() + self.overflow_limit
+        if exhausted:
+            print(f"[db] Connection pool exhausted ({self.checkedout()} in use); "
+                  f"waiting up to {self.checkout_timeout:.0f}s", flush=True)
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with _metrics_lock:
+                POOL_METRICS.timeouts += 1
+            print(f"[db] Timed out after {self.checkout_timeout:.0f}s waiting for a pooled connection", flush=True)
+            raise
+        finally:
+            wait_ms = (time.perf_counter() - t0) * 1000
+            with _metrics_lock:
+                POOL_METRICS.checkouts += 1
+                POOL_METRICS.wait_ms_total += wait_ms
+                POOL_METRICS.wait_ms_max = max(POOL_METRICS.wait_ms_max, wait_ms)
+                if exhausted or wait_ms >= settings.DB_POOL_WAIT_WARN_MS:
+                    POOL_METRICS.waited += 1
+            if wait_ms >= settings.DB_POOL_WAIT_WARN_MS:
+                print(f"[db] Waited {wait_ms:.0f} ms for a pooled connection", flush=True)
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() keyword arguments for `url` from the DB_* settings."""
+    backend = make_url(url).get_backend_name()
+    options = {
+        "future": True,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if backend == "sqlite":
+        # SQLite keeps SQLAlchemy's default pool; sizing and server timeouts do not apply
+        return options
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    The process-wide engine, created on first use so importing models never connects.
+    Pending migrations are applied then, unless DB_AUTO_MIGRATE is off.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not settings.DB_URL:
+                    raise RuntimeError("DB_URL is not set")
+                engine = create_engine(settings.DB_URL, **engine_options(settings.DB_URL))
+                from .migrations import pending_versions, upgrade
+                if settings.DB_AUTO_MIGRATE:
+                    # databases from an earlier release get the tables and columns the models expect
+                    upgrade(engine)
+                else:
+                    pending = pending_versions(engine)
+                    if pending:
+                        # queries on Job select columns these steps add, and fail until they run
+                        print(f"[db] Schema is behind the models (pending: {', '.join(pending)}); "
+                              f"run `python -m src.db.migrations`", flush=True)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    # `from src.db.db import engine` keeps working, but only connects when asked for
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(name)
+
+
+class _Session(Session):
+    """Session bound to get_engine() at first use rather than at import."""
+
+    def get_bind(self, mapper=None, **kw):
+        return get_engine()
+
+
+SessionLocal = sessionmaker(class_=_Session, autoflush=False, expire_on_commit=False)
+
+
+def pool_status() -> dict:
+    """Current pool occupancy plus checkout/wait counters, for monitoring."""
+    pool = get_engine().pool
+    status = {"pool": pool.__class__.__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(),
+                      checked_in=pool.checkedin())
+    with _metrics_lock:
+        m = POOL_METRICS
+        status.update(
+            checkouts=m.checkouts,
+            waited=m.waited,
+            timeouts=m.timeouts,
+            wait_ms_avg=round(m.wait_ms_total / m.checkouts, 2) if m.checkouts else 0.0,
+            wait_ms_max=round(m.wait_ms_max, 2),
+        )
+    return status
+
+_tables_ready = set()    # (database URL, table) pairs known to exist
+_tables_warned = set()
+
+
+def table_ready(conn: Connection, name: str, warning: str) -> bool:
+    """
+    Whether the connection's database has table `name` yet, for tables a migration
+    adds; prints `warning` once per database and table when not.
+    """
+    key = (str(conn.engine.url), name)
+    if key in _tables_ready:
+        return True
+    if inspect(conn).has_table(name):
+        _tables_ready.add(key)
+        return True
+    if key not in _tables_warned:
+        _tables_warned.add(key)
+        print(warning, flush=True)
+    return False
 
-load_dotenv()
-engine = create_engine(os.environ["DB_URL"], future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 
 
@@ -26,4 +185,4 @@ def get_session():
         session.rollback()
         raise
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
@@ -0,0 +1,202 @@
+"""
+Ordered, idempotent schema migrations for databases created before the current models.
+
+Each step runs once, in its own transaction, and is recorded in schema_migrations.
+Steps check what already exists, so running them against a database built by
+create_all() (which already has everything) is harmless. db.get_engine() applies
+pending steps when it first connects (DB_AUTO_MIGRATE=0 turns that off).
+
+    python -m src.db.migrations             # apply pending steps
+    python -m src.db.migrations status      # list applied / pending steps
+    python -m src.db.migrations explain     # check the hot queries use their indexes
+"""
+import argparse
+import sys
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .contacts import add_contacts, contact_rows, split_emails
+from .db import get_engine
+from .models import NEWEST_FIRST, BoardFetchState, Company, DailyStats, DomainEmails, Job, JobContact, JobsApplied
+from .rollup import rebuild as rebuild_rollup
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", String(64), primary_key=True),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+def _add_columns(conn: Connection, table, names: List[str]) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        col = table.c[name]
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {col.type.compile(conn.dialect)}"))
+
+
+def _create_indexes(conn: Connection, table, names: List[str]) -> None:
+    for index in table.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _base_schema(conn: Connection) -> None:
+    # The first release's tables, plus the domain email cache (enrichment) and board fetch state (ingest)
+    for model in (Company, Job, JobsApplied, DomainEmails, BoardFetchState):
+        model.__table__.create(conn, checkfirst=True)
+
+
+def _job_columns(conn: Connection) -> None:
+    _add_columns(conn, Job.__table__, ["skills_mask", "skills_version", "is_junior_title",
+                                       "is_senior_title", "is_remote"])
+    _create_indexes(conn, Job.__table__, ["ix_jobs_skills_version"])
+    if conn.dialect.name == "postgresql":
+        # contact_email is filled in later by the enrichment stage
+        conn.execute(text("ALTER TABLE jobs ALTER COLUMN contact_email DROP NOT NULL"))
+
+
+def _hot_path_indexes(conn: Connection) -> None:
+    _create_indexes(conn, Job.__table__, ["ix_jobs_unapplied", "ix_jobs_posted_at"])
+    _create_indexes(conn, JobsApplied.__table__, ["ix_jobs_applied_applied_at"])
+
+
+def _posted_at_desc_index(conn: Connection) -> None:
+    # 0003 first built ix_jobs_posted_at ascending, which Postgres cannot use for DESC NULLS LAST
+    conn.execute(text("DROP INDEX IF EXISTS ix_jobs_posted_at"))
+    _create_indexes(conn, Job.__table__, ["ix_jobs_posted_at"])
+
+
+def _job_contacts(conn: Connection) -> None:
+    # One row per address, split out of the comma-joined jobs.contact_email
+    JobContact.__table__.create(conn, checkfirst=True)
+    session = Session(bind=conn)
+    q = select(Job.id, Job.contact_email).where(Job.contact_email.is_not(None)).order_by(Job.id)
+    rows = []
+    for job_id, emails in conn.execute(q).all():
+        rows += contact_rows(job_id, split_emails(emails), "migrated")
+        if len(rows) >= 5000:
+            add_contacts(session, rows)
+            rows = []
+    add_contacts(session, rows)
+
+
+def _daily_stats(conn: Connection) -> None:
+    # rebuild reads jobs.created_at, which 0007 adds; databases upgrading past both get it here
+    _add_columns(conn, Job.__table__, ["created_at"])
+    DailyStats.__table__.create(conn, checkfirst=True)
+    rebuild_rollup(Session(bind=conn))
+
+
+def _job_created_at(conn: Connection) -> None:
+    # Jobs stored before this step keep created_at NULL; the rollup counts them on their posted date
+    _add_columns(conn, Job.__table__, ["created_at"])
+
+
+# (version, step), oldest first; never reorder or rename a released step
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_base_schema", _base_schema),
+    ("0002_job_index_columns", _job_columns),
+    ("0003_hot_path_indexes", _hot_path_indexes),
+    ("0004_job_contacts", _job_contacts),
+    ("0005_daily_stats", _daily_stats),
+    ("0006_posted_at_desc_index", _posted_at_desc_index),
+    ("0007_job_created_at", _job_created_at),
+]
+
+
+def applied_versions(conn: Connection) -> set:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_versions(engine=None) -> List[str]:
+    """Versions not yet applied to the database, oldest first."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [version for version, _ in MIGRATIONS if version not in done]
+
+
+def upgrade(engine=None) -> List[str]:
+    """Apply pending migrations in order; returns the versions applied."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    applied = []
+    for version, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(version=version))
+        print(f"[migrate] applied {version}", flush=True)
+        applied.append(version)
+    return applied
+
+
+def hot_queries():
+    """(name, statement, index it should use) for the queries the pipeline runs most."""
+    day = text("'2024-01-15'")
+    return [
+        ("unapplied jobs", select(Job.id).where(Job.applied_at.is_(None)).order_by(Job.id),
+         "ix_jobs_unapplied"),
+        ("newest postings", select(Job.id, Job.posted_at).order_by(NEWEST_FIRST).limit(50),
+         "ix_jobs_posted_at"),
+        ("applications on a day",
+         select(func.count(JobsApplied.id)).where(JobsApplied.applied_at >= day,
+                                                  JobsApplied.applied_at < text("'2024-01-16'")),
+         "ix_jobs_applied_applied_at"),
+    ]
+
+
+def explain(conn: Connection, stmt) -> List[str]:
+    """The database's query plan for `stmt`, one line per row."""
+    sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [" ".join(str(v) for v in row[1:]) for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    return [row[0] for row in conn.execute(text(f"EXPLAIN {sql}"))]
+
+
+def check_indexes(engine=None) -> bool:
+    """Print the plan of every hot query; False if one of them does not use its index."""
+    engine = engine or get_engine()
+    ok = True
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # small tables are cheaper to scan; only ask whether the index is usable
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, stmt, index in hot_queries():
+            plan = explain(conn, stmt)
+            uses = any(index in line for line in plan)
+            ok &= uses
+            print(f"[explain] {name}: {'uses ' + index if uses else 'does NOT use ' + index}")
+            for line in plan:
+                print(f"          {line}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply or inspect schema migrations.")
+    ap.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status", "explain"])
+    args = ap.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade()
+        print(f"[migrate] {len(applied)} migration(s) applied; schema is current")
+    elif args.command == "status":
+        with get_engine().begin() as conn:
+            done = applied_versions(conn)
+        for version, _ in MIGRATIONS:
+            print(f"{'applied' if version in done else 'pending'}  {version}")
+    else:
+        sys.exit(0 if check_indexes() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column 
-from sqlalchemy import String, Text, DateTime, ForeignKey, JSON, func, Integer, Boolean 
+from sqlalchemy import String, Text, Date, DateTime, ForeignKey, JSON, func, Integer, Boolean, BigInteger, Index, UniqueConstraint, text
 
 Base = declarative_base()
 
@@ -20,22 +20,83 @@ class Job(Base):
     company_id: Mapped[int] = mapped_column(ForeignKey("companies.id"), index=True)
     title: Mapped[str] = mapped_column(String(255), index=True)
     location: Mapped[str | None] = mapped_column(String(255))
-    jd_text: Mapped[str] = mapped_column(Text)
+    # The two large columns are deferred: loaded on first access (or with undefer()), never by list queries
+    jd_text: Mapped[str] = mapped_column(Text, deferred=True)
     url: Mapped[str] = mapped_column(String(1024), unique=True)
     posted_at: Mapped[DateTime | None] = mapped_column(DateTime)
     source: Mapped[str] = mapped_column(String(50))  # "greenhouse" | "lever"
-    raw_json: Mapped[dict] = mapped_column(JSON)
-    contact_email:  Mapped[str] = mapped_column(String(255), index=True)
+    raw_json: Mapped[dict] = mapped_column(JSON, deferred=True)
+    contact_email:  Mapped[str | None] = mapped_column(String(255), index=True, nullable=True)
     applied_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)  # <-- new column
+    # When ingest first stored the job (naive UTC); the day daily_stats counts it as found
+    created_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
+    # Persisted match index (see match.skills.job_index); recomputed when skills_version != CATALOG_VERSION
+    skills_mask: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    skills_version: Mapped[str | None] = mapped_column(String(16), nullable=True, index=True)
+    is_junior_title: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    is_senior_title: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    is_remote: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
     company = relationship("Company", back_populates="jobs")
 
+    __table_args__ = (
+        # Drafting, sending and ranking only ever look at jobs not yet applied to
+        Index("ix_jobs_unapplied", "id",
+              postgresql_where=text("applied_at IS NULL"), sqlite_where=text("applied_at IS NULL")),
+    )
+
+# Newest postings first, undated ones last: the order of the jobs export, served by ix_jobs_posted_at
+NEWEST_FIRST = Job.posted_at.desc().nullslast()
+# A Postgres btree only serves DESC NULLS LAST if it is declared that way. SQLite cannot declare
+# NULLS LAST in an index, but sorts NULLs lowest, so its plain DESC index gives the same order.
+Index("ix_jobs_posted_at", NEWEST_FIRST).ddl_if(dialect="postgresql")
+Index("ix_jobs_posted_at", Job.posted_at.desc()).ddl_if(
+    callable_=lambda ddl, target, bind, **kw: kw["dialect"].name != "postgresql")
+
 # Add this to your models.py file
 class JobsApplied(Base):
     __tablename__ = "jobs_applied"  
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    applied_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+    applied_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now(), index=True)
     job_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     job_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     company_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     response_received: Mapped[bool | None] = mapped_column(Boolean, default=False)
-    cover_letter_sent: Mapped[str | None] = mapped_column(String(550), nullable=True)
\ No newline at end of file
+    cover_letter_sent: Mapped[str | None] = mapped_column(String(550), nullable=True)
+
+class JobContact(Base):
+    """One recipient address per row for a job (jobs.contact_email keeps the comma-joined copy)."""
+    __tablename__ = "job_contacts"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), index=True)
+    email: Mapped[str] = mapped_column(String(255), index=True)  # stripped, lower-case
+    domain: Mapped[str] = mapped_column(String(255), index=True)
+    source: Mapped[str] = mapped_column(String(20))  # "posting" | "company" | "migrated" | "sent"
+    created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("job_id", "email", name="uq_job_contacts_job_email"),)
+
+class DailyStats(Base):
+    """Per-day counters the statistics API reads, kept up to date by db.rollup."""
+    __tablename__ = "daily_stats"
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    jobs_found: Mapped[int] = mapped_column(Integer, default=0, server_default="0")    # jobs first stored that day
+    applications: Mapped[int] = mapped_column(Integer, default=0, server_default="0")  # jobs_applied rows
+    recipients: Mapped[int] = mapped_column(Integer, default=0, server_default="0")    # addresses first emailed that day
+    updated_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class DomainEmails(Base):
+    """Per-domain cache of company emails found by the enrichment stage."""
+    __tablename__ = "domain_emails"
+    domain: Mapped[str] = mapped_column(String(255), primary_key=True)
+    emails: Mapped[str | None] = mapped_column(Text, nullable=True)  # comma-separated; NULL = nothing found
+    looked_up_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+
+class BoardFetchState(Base):
+    """Last fetch of a company's ATS board, used to skip boards and postings that have not changed."""
+    __tablename__ = "board_fetch_state"
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id"), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    posting_hashes: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # posting url -> content hash
+    fetched_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,134 @@
+"""
+daily_stats: per-day counters behind the statistics API, so its queries read a
+row per day instead of scanning jobs / jobs_applied / job_contacts on every call.
+
+Counters are bumped in the same transaction as the change they count, on the
+UTC day `rebuild` later reads from the row: record_jobs_found at ingest, on the
+day in jobs.created_at, and record_application at submit, on the day of its
+applied_at. Jobs stored before migration 0007 have no created_at; `rebuild`
+counts those on their posted date, so for them only the all-time total matches
+what was counted live. `rebuild` recomputes every day from the base tables,
+e.g. after a manual fix-up:
+
+    python -m src.db.rollup rebuild
+"""
+import argparse
+import datetime as dt
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, select
+
+from .contacts import add_contacts, contact_rows, contacts_ready
+from .db import get_session, table_ready
+from .models import DailyStats, Job, JobContact, JobsApplied
+from .upsert import _insert
+
+COUNTERS = ("jobs_found", "applications", "recipients")
+
+
+def _today() -> dt.date:
+    return dt.datetime.utcnow().date()
+
+
+def stats_ready(session) -> bool:
+    """Whether the session's database has daily_stats yet; warns once per database when not."""
+    return table_ready(session.connection(), DailyStats.__tablename__,
+                       "[rollup] daily_stats table missing; run `python -m src.db.migrations` "
+                       "(its rebuild counts everything recorded until then)")
+
+
+def bump(session, day: dt.date, **deltas: int) -> None:
+    """Add `deltas` to the day's counters with one INSERT ... ON CONFLICT DO UPDATE."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas or not stats_ready(session):
+        return
+    table = DailyStats.__table__
+    stmt = _insert(session, table).values(day=day, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day],
+        set_={**{k: table.c[k] + stmt.excluded[k] for k in deltas}, "updated_at": func.now()},
+    )
+    session.execute(stmt)
+
+
+def record_jobs_found(session, count: int, day: Optional[dt.date] = None) -> None:
+    """Count jobs newly stored by ingest; `day` should be the date of their created_at (UTC)."""
+    bump(session, day or _today(), jobs_found=count)
+
+
+def record_application(session, job_id: int, emails: Iterable[str], day: Optional[dt.date] = None) -> int:
+    """
+    Count one application to `job_id`, sent to `emails`, and those addresses no
+    other application went to. Returns the number of new recipients.
+
+    `day` should be the date of the application's applied_at (UTC). Addresses not
+    yet in job_contacts (taken from jobs.contact_email) are added as source "sent",
+    since that is where `rebuild` counts recipients from. Before migration 0005 has
+    run, nothing is recorded and 0 is returned; its rebuild counts the application.
+    """
+    emails = {e.strip().lower() for e in emails if e and e.strip()}
+    if not stats_ready(session):
+        return 0
+    seen = set()
+    if emails and contacts_ready(session):
+        add_contacts(session, contact_rows(job_id, sorted(emails), "sent"))
+        seen = set(session.scalars(
+            select(JobContact.email).distinct()
+            .join(Job, Job.id == JobContact.job_id)
+            .where(JobContact.email.in_(emails), Job.applied_at.is_not(None), Job.id != job_id)
+        ))
+    new = len(emails - seen)
+    bump(session, day or _today(), applications=1, recipients=new)
+    return new
+
+
+def totals(session) -> Dict[str, int]:
+    """All-time sums of every counter."""
+    row = session.execute(select(*(func.coalesce(func.sum(DailyStats.__table__.c[k]), 0) for k in COUNTERS))).one()
+    return {k: int(v) for k, v in zip(COUNTERS, row)}
+
+
+def rebuild(session) -> int:
+    """Recompute daily_stats from jobs, jobs_applied and job_contacts. Returns days written."""
+    days: Dict[dt.date, Dict[str, int]] = {}
+
+    def add(rows, counter):
+        for day, n in rows:
+            if day is None:
+                continue
+            if isinstance(day, str):  # SQLite returns date() as text
+                day = dt.date.fromisoformat(day)
+            days.setdefault(day, dict.fromkeys(COUNTERS, 0))[counter] += n
+
+    # jobs stored before created_at existed fall back to their posted date, undated ones to today
+    found_day = func.date(func.coalesce(Job.created_at, Job.posted_at, func.now()))
+    add(session.execute(select(found_day, func.count(Job.id)).group_by(found_day)), "jobs_found")
+    applied_day = func.date(JobsApplied.applied_at)
+    add(session.execute(select(applied_day, func.count(JobsApplied.id)).group_by(applied_day)), "applications")
+    first_sent = (select(JobContact.email, func.min(func.date(Job.applied_at)).label("day"))
+                  .join(Job, Job.id == JobContact.job_id)
+                  .where(Job.applied_at.is_not(None))
+                  .group_by(JobContact.email)
+                  .subquery())
+    add(session.execute(select(first_sent.c.day, func.count()).group_by(first_sent.c.day)), "recipients")
+
+    session.execute(delete(DailyStats))
+    if days:
+        session.execute(_insert(session, DailyStats.__table__).values(
+            [{"day": day, **counts} for day, counts in sorted(days.items())]))
+    return len(days)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the daily_stats rollup.")
+    ap.add_argument("command", choices=["rebuild", "show"])
+    args = ap.parse_args()
+
+    with get_session() as s:
+        if args.command == "rebuild":
+            print(f"[rollup] rebuilt {rebuild(s)} days")
+        print(f"[rollup] totals: {totals(s)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import Company, Job
+
+COMPANY_COLUMNS = ("name", "website", "ats_type", "ats_slug", "domain")
+
+# Columns refreshed when an already-stored posting changes upstream
+JOB_UPDATE_COLUMNS = ("title", "jd_text", "location", "posted_at", "contact_email", "raw_json",
+                      "skills_mask", "skills_version", "is_junior_title", "is_senior_title", "is_remote")
+# raw_json is left out of the change check: Postgres has no equality operator for json
+JOB_COMPARE_COLUMNS = ("title", "jd_text", "location", "posted_at", "contact_email")
+
+
+@dataclass
+class UpsertCounts:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    ids: Dict[str, int] = field(default_factory=dict, repr=False)  # url -> id of every row written
+
+    def __iadd__(self, other: "UpsertCounts") -> "UpsertCounts":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.ids.update(other.ids)
+        return self
+
+
+def _insert(session, table):
+    """Dialect-specific INSERT that supports ON CONFLICT (Postgres and SQLite)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+
+
+def upsert_companies(session, companies: Iterable[dict]) -> Dict[str, Company]:
+    """Insert any missing companies in one statement and return name -> Company for all of them."""
+    rows = {c["name"]: {k: c.get(k) for k in COMPANY_COLUMNS} for c in companies}
+    if not rows:
+        return {}
+    stmt = _insert(session, Company.__table__).values(list(rows.values()))
+    session.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+    found = session.scalars(select(Company).where(Company.name.in_(list(rows))))
+    return {company.name: company for company in found}
+
+
+def upsert_jobs(session, rows: List[dict], batch_size: int = 500) -> UpsertCounts:
+    """
+    Write job rows with INSERT ... ON CONFLICT (url) DO UPDATE, one statement per batch.
+    Existing rows are only rewritten when a compared column differs and the job
+    has not been applied to yet; everything else counts as unchanged.
+    """
+    counts = UpsertCounts()
+    # a statement may not touch the same url twice, so the last copy of a posting wins
+    rows = list({r["url"]: r for r in rows}.values())
+    table = Job.__table__
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        urls = [r["url"] for r in batch]
+        existing = set(session.scalars(select(Job.url).where(Job.url.in_(urls))))
+
+        stmt = _insert(session, table).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.url],
+            set_={col: stmt.excluded[col] for col in JOB_UPDATE_COLUMNS},
+            where=table.c.applied_at.is_(None) & or_(
+                *(table.c[col].is_distinct_from(stmt.excluded[col]) for col in JOB_COMPARE_COLUMNS)
+            ),
+        ).returning(table.c.url, table.c.id)
+        ids = dict(session.execute(stmt).all())
+        written = set(ids)
+        counts.ids.update(ids)
+
+        counts.inserted += len(written - existing)
+        counts.updated += len(written & existing)
+        counts.unchanged += len(batch) - len(written)
+    return counts
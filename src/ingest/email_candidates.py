@@ -0,0 +1,98 @@
+import os
+import re
+from typing import List, Optional
+from urllib.parse import urlparse
+
+# Addresses we never want to mail (accessibility, privacy, support desks, ...)
+EXCLUDE_TERMS = ["accommodat", "access", "compliance", "dpo", "security",
+                 "humans", "people-team", "g.biow", "support", "benefit"]
+
+# Mailbox prefixes companies use for hiring, best first, with how likely each is to reach a recruiter
+PREFIXES = {
+    "careers": 1.0,
+    "jobs": 1.0,
+    "recruiting": 1.0,
+    "talent": 0.9,
+    "recruit": 0.8,
+    "hr": 0.8,
+    "hello": 0.6,
+}
+
+# How many guessed addresses a domain gets; every one of them is mailed on each application
+EMAIL_CANDIDATES_MAX = int(os.getenv("EMAIL_CANDIDATES_MAX", "2"))
+
+# Public suffixes with two labels; for these the registrable domain has three (acme.co.uk)
+MULTI_PART_SUFFIXES = frozenset("""
+co.uk org.uk ac.uk gov.uk ltd.uk plc.uk me.uk
+com.au net.au org.au edu.au gov.au
+co.nz org.nz net.nz
+co.jp ne.jp or.jp
+co.in net.in org.in firm.in
+co.za org.za
+co.kr or.kr
+com.br com.mx com.ar com.co com.pe
+com.sg com.hk com.tw com.cn com.my com.ph com.tr com.ua com.pl com.eg
+co.il co.id co.th
+""".split())
+
+EMAIL_RX = re.compile(r"^[a-z0-9](?:[a-z0-9._%+-]{0,62}[a-z0-9])?@[a-z0-9-]+(?:\.[a-z0-9-]+)+$")
+IP_RX = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+
+
+def registrable_domain(url_or_host: Optional[str]) -> Optional[str]:
+    """
+    The domain a company registers, from a URL or bare host name:
+    https://www.wise.com/jobs -> wise.com, careers.acme.co.uk -> acme.co.uk.
+    """
+    if not url_or_host:
+        return None
+    raw = url_or_host.strip().lower()
+    host = urlparse(raw if "//" in raw else f"//{raw}").hostname or ""
+    host = host.rstrip(".")
+    if not host or IP_RX.match(host) or "." not in host:
+        return None
+    labels = host.split(".")
+    if labels[0] == "www":
+        labels = labels[1:]
+    keep = 3 if ".".join(labels[-2:]) in MULTI_PART_SUFFIXES else 2
+    return ".".join(labels[-keep:]) if len(labels) >= keep else None
+
+
+def syntax_score(email: str, domain: Optional[str] = None) -> float:
+    """
+    0..1 plausibility of a hiring address from its text alone (no MX or SMTP lookups):
+    0 for malformed or excluded addresses, otherwise the prefix weight, halved
+    when the address is not on `domain`.
+    """
+    email = (email or "").strip().lower()
+    if not EMAIL_RX.match(email) or ".." in email:
+        return 0.0
+    if any(term in email for term in EXCLUDE_TERMS):
+        return 0.0
+    local, _, host = email.partition("@")
+    base = re.split(r"[._+-]", local, maxsplit=1)[0]
+    weight = PREFIXES.get(local) or PREFIXES.get(base)
+    if weight is None:
+        weight = next((w for p, w in PREFIXES.items() if local.startswith(p)), 0.3)
+    if domain and host != domain and not host.endswith("." + domain):
+        weight *= 0.5
+    return weight
+
+
+def candidates(domain: Optional[str], limit: int = EMAIL_CANDIDATES_MAX) -> List[str]:
+    """
+    The `limit` most plausible hiring addresses for a registrable domain, best
+    first (careers@ and jobs@ by default). Weaker guesses such as hr@ or hello@
+    often bounce, so they are only returned when `limit` asks for them.
+    """
+    if not domain:
+        return []
+    scored = [(syntax_score(f"{prefix}@{domain}", domain), f"{prefix}@{domain}") for prefix in PREFIXES]
+    ranked = sorted((pair for pair in scored if pair[0] > 0), key=lambda pair: -pair[0])  # stable: PREFIXES order
+    return [email for _, email in ranked[:max(0, limit)]]
+
+
+def candidate_emails(company_url: str) -> Optional[str]:
+    """Comma-separated candidates for a company website (the extract_company_emails format), or None."""
+    emails = candidates(registrable_domain(company_url))
+    return ",".join(emails) if emails else None
@@ -0,0 +1,146 @@
+import os
+import argparse
+import threading
+import datetime as dt
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import select
+
+from ..db.contacts import add_contacts, contact_rows, fit_contact_email, split_emails
+from ..db.db import SessionLocal
+from ..db.models import Company, Job, DomainEmails
+from ..llm.ollama_client import extract_company_emails
+from .email_candidates import EXCLUDE_TERMS, candidate_emails, registrable_domain, syntax_score
+
+EMAIL_CACHE_TTL_DAYS = int(os.getenv("EMAIL_CACHE_TTL_DAYS", "30"))          # domains with emails
+EMAIL_CACHE_NEG_TTL_DAYS = int(os.getenv("EMAIL_CACHE_NEG_TTL_DAYS", "7"))   # domains where nothing was found
+
+def merge_contact_emails(existing: Optional[str], emails: Optional[str]) -> Optional[str]:
+    """Union two comma-separated email strings, dropping excluded addresses."""
+    found = {e.strip() for e in (existing or "").split(",") if e.strip()}
+    for email in (emails or "").split(","):
+        email = email.strip()
+        if email and not any(term in email.lower() for term in EXCLUDE_TERMS):
+            found.add(email)
+    return ','.join(sorted(found)) if found else None
+
+def _is_fresh(entry: DomainEmails, now: dt.datetime) -> bool:
+    if entry.looked_up_at is None:
+        return False
+    ttl = EMAIL_CACHE_TTL_DAYS if entry.emails else EMAIL_CACHE_NEG_TTL_DAYS
+    return now - entry.looked_up_at < dt.timedelta(days=ttl)
+
+def cached_emails(session, domain: Optional[str]) -> Optional[str]:
+    """Cached emails for a domain, or None. Never calls the LLM, so ingest can use it freely."""
+    if not domain:
+        return None
+    entry = session.get(DomainEmails, domain)
+    return entry.emails if entry else None
+
+def pending_companies(session, now: dt.datetime) -> Dict[str, Company]:
+    """One company per domain whose cache entry is missing or expired."""
+    cache = {e.domain: e for e in session.scalars(select(DomainEmails))}
+    pending = {}
+    for company in session.scalars(select(Company).where(Company.domain.is_not(None))):
+        if company.domain in pending or not company.website:
+            continue
+        entry = cache.get(company.domain)
+        if entry is not None and _is_fresh(entry, now):
+            continue
+        pending[company.domain] = company
+    return pending
+
+def backfill_contacts(session, domain: str, emails: Optional[str]) -> int:
+    """Merge a domain's emails into the contacts of its not-yet-applied jobs. Returns jobs changed."""
+    if not emails:
+        return 0
+    jobs = session.scalars(
+        select(Job)
+        .join(Company, Company.id == Job.company_id)
+        .where(Company.domain == domain, Job.applied_at.is_(None))
+    )
+    domain_emails = set(split_emails(emails))
+    changed, rows = 0, []
+    for job in jobs:
+        merged = merge_contact_emails(job.contact_email, emails)
+        fitted = fit_contact_email(merged)
+        if fitted != job.contact_email:
+            job.contact_email = fitted
+            changed += 1
+        rows += contact_rows(job.id, [e for e in split_emails(merged) if e in domain_emails], "company")
+    # pairs already stored (from the posting or an earlier lookup) are left as they are
+    add_contacts(session, rows)
+    return changed
+
+def backfill_domains(domains: Iterable[str]) -> int:
+    s = SessionLocal()
+    try:
+        changed = sum(backfill_contacts(s, d, cached_emails(s, d)) for d in domains)
+        s.commit()
+        return changed
+    finally:
+        s.close()
+
+def lookup_emails(company: Company, use_llm: bool = False) -> Optional[str]:
+    """
+    Rule-based hiring addresses for a company (see email_candidates). With use_llm,
+    addresses the LLM suggests are added when they pass the same syntax scoring.
+    """
+    emails = candidate_emails(company.website)
+    if use_llm:
+        domain = registrable_domain(company.website)
+        suggested = [e for e in (extract_company_emails(company.name, company.website) or "").split(",")
+                     if syntax_score(e, domain) > 0]
+        emails = merge_contact_emails(emails, ",".join(suggested))
+    return emails
+
+def enrich(limit: Optional[int] = None, use_llm: bool = False) -> Set[str]:
+    """Look up emails for every domain missing from (or expired in) the cache. Returns domains refreshed."""
+    s = SessionLocal()
+    enriched = set()
+    try:
+        pending = pending_companies(s, dt.datetime.utcnow())
+        print(f"[enrich] {len(pending)} domains need email lookup")
+        for domain, company in pending.items():
+            if limit is not None and len(enriched) >= limit:
+                break
+            emails = lookup_emails(company, use_llm)
+            entry = s.get(DomainEmails, domain)
+            if entry is None:
+                entry = DomainEmails(domain=domain)
+                s.add(entry)
+            entry.emails = emails  # None is cached too, as a negative entry
+            entry.looked_up_at = dt.datetime.utcnow()
+            changed = backfill_contacts(s, domain, emails)
+            s.commit()
+            enriched.add(domain)
+            print(f"[enrich] {domain}: {emails or 'none found'} ({changed} jobs updated)")
+    finally:
+        s.close()
+    return enriched
+
+class EnrichmentThread(threading.Thread):
+    """Runs enrich() alongside ingest; `enriched` holds the refreshed domains once joined."""
+
+    def __init__(self, limit: Optional[int] = None, use_llm: bool = False):
+        super().__init__(name="email-enrichment", daemon=True)
+        self.limit = limit
+        self.use_llm = use_llm
+        self.enriched: Set[str] = set()
+
+    def run(self):
+        try:
+            self.enriched = enrich(limit=self.limit, use_llm=self.use_llm)
+        except Exception as e:
+            print(f"[enrich] Enrichment stopped: {e}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Look up company emails for domains missing from the cache.")
+    ap.add_argument("--limit", type=int, default=None, help="Max domains to look up this run")
+    ap.add_argument("--llm", action="store_true",
+                    help="Also ask the LLM for addresses (slow; rule-based candidates are always used)")
+    args = ap.parse_args()
+    enrich(limit=args.limit, use_llm=args.llm)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
 import csv
 from . import run_ingest  # optional: ensure latest data
 from ..db.db import SessionLocal
-from ..db.models import Job, Company
+from ..db.models import Job, Company, NEWEST_FIRST
 
 def export(path="data/junior_jobs.csv"):
     s = SessionLocal()
     rows = (
         s.query(Job, Company)
         .join(Company, Company.id==Job.company_id)
-        .order_by(Job.posted_at.desc().nullslast())
+        .order_by(NEWEST_FIRST)
         .all()
     )
     with open(path, "w", newline="") as f:
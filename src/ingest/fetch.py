@@ -0,0 +1,118 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from ..services.http import ThreadLocalSessions
+from . import greenhouse, lever
+
+SOURCES = {"greenhouse": greenhouse, "lever": lever}
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "16"))  # boards in flight overall
+INGEST_PER_HOST = int(os.getenv("INGEST_PER_HOST", "4"))         # boards in flight per ATS host
+INGEST_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", "30"))        # seconds per board request
+
+
+@dataclass
+class BoardPage:
+    """Result of one board fetch. `not_modified` means a 304 or an identical payload hash."""
+    postings: list = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    not_modified: bool = False
+
+
+class HostLimiter:
+    """Caps the number of concurrent requests sent to any single host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+        with sem:
+            yield
+
+
+class BoardFetcher:
+    """Fetches Greenhouse/Lever boards on a thread pool with bounded per-host parallelism."""
+
+    def __init__(self, max_workers: int = INGEST_CONCURRENCY, per_host: int = INGEST_PER_HOST,
+                 timeout: float = INGEST_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.limiter = HostLimiter(per_host)
+        self._sessions = ThreadLocalSessions(pool_maxsize=self.limiter.per_host, pool_connections=4)
+
+    def _http(self) -> requests.Session:
+        return self._sessions.get()
+
+    def fetch(self, c: dict, prev: Optional[dict] = None) -> BoardPage:
+        """
+        Fetch one board. `prev` holds the etag/last_modified/content_hash of the
+        last fetch; unchanged boards come back with not_modified=True and no postings.
+        """
+        prev = prev or {}
+        source = SOURCES[c["ats_type"]]
+        url = source.board_url(c["ats_slug"])
+        headers = {}
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("last_modified"):
+            headers["If-Modified-Since"] = prev["last_modified"]
+
+        with self.limiter.slot(url):
+            resp = self._http().get(url, headers=headers, timeout=self.timeout)
+
+        if resp.status_code == 304:
+            return BoardPage(etag=prev.get("etag"), last_modified=prev.get("last_modified"),
+                             content_hash=prev.get("content_hash"), not_modified=True)
+        # error bodies must never be hashed or parsed as a board, or their state would be saved
+        resp.raise_for_status()
+
+        page = BoardPage(
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            content_hash=hashlib.sha256(resp.content).hexdigest(),
+        )
+        if page.content_hash == prev.get("content_hash"):
+            page.not_modified = True
+            return page
+        page.postings = source.parse_board(resp.json())
+        return page
+
+    def fetch_all(self, companies: Iterable[dict], states: Optional[Dict[str, dict]] = None
+                  ) -> Iterator[Tuple[dict, BoardPage, Optional[Exception]]]:
+        """
+        Yields (company, page, error) as boards complete, so the caller can
+        write one board to the DB while the others are still downloading.
+        `states` maps company name -> previous fetch state for conditional requests.
+        Companies with an unsupported ats_type are skipped.
+        """
+        states = states or {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest") as pool:
+            futures = {
+                pool.submit(self.fetch, c, states.get(c["name"])): c
+                for c in companies
+                if c.get("ats_type") in SOURCES and c.get("ats_slug")
+            }
+            for fut in as_completed(futures):
+                c = futures[fut]
+                try:
+                    yield c, fut.result(), None
+                except (requests.RequestException, ValueError) as e:
+                    yield c, BoardPage(), e
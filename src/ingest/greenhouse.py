@@ -0,0 +1,12 @@
+import os
+
+API_BASE = os.getenv("GREENHOUSE_API_BASE", "https://boards-api.greenhouse.io")
+
+def board_url(slug: str) -> str:
+    return f"{API_BASE}/v1/boards/{slug}/jobs?content=true"
+
+def parse_board(payload) -> list:
+    """Return the list of postings from a Greenhouse board payload."""
+    if not isinstance(payload, dict):
+        raise ValueError("Unexpected response format")
+    return payload.get("jobs", [])
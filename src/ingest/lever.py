@@ -0,0 +1,14 @@
+import os
+
+API_BASE = os.getenv("LEVER_API_BASE", "https://api.lever.co")
+
+def board_url(slug: str) -> str:
+    return f"{API_BASE}/v0/postings/{slug}?mode=json"
+
+def parse_board(payload) -> list:
+    """Return the list of postings from a Lever payload (list or wrapped dict)."""
+    if isinstance(payload, dict):
+        return payload.get("postings") or payload.get("jobs") or []
+    if isinstance(payload, list):
+        return payload
+    raise ValueError("Unexpected response format")
@@ -0,0 +1,33 @@
+import datetime as dt
+
+def normalize_greenhouse(j: dict) -> dict:
+    posted = j.get("updated_at")
+    return {
+        "title": j["title"],
+        "jd_raw": j.get("content", ""),
+        "url": j["absolute_url"],
+        "location": (j.get("location") or {}).get("name"),
+        "posted_at": dt.datetime.fromisoformat(posted.replace("Z", "+00:00")) if posted else None,
+        "source": "greenhouse",
+        "raw_json": j,
+    }
+
+def normalize_lever(j: dict) -> dict:
+    posted_ms = j.get("createdAt")
+    return {
+        "title": j.get("text", ""),
+        "jd_raw": j.get("description", ""),
+        "url": j["hostedUrl"],
+        "location": (j.get("categories") or {}).get("location"),
+        "posted_at": dt.datetime.utcfromtimestamp(posted_ms/1000) if posted_ms else None,
+        "source": "lever",
+        "raw_json": j,
+    }
+
+NORMALIZERS = {
+    "greenhouse": normalize_greenhouse,
+    "lever": normalize_lever,
+}
+
+def normalize_posting(ats_type: str, j: dict) -> dict:
+    return NORMALIZERS[ats_type](j)
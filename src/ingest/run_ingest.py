@@ -1,9 +1,21 @@
-import re, yaml, requests, datetime as dt, html
+import os, re, yaml, html, argparse, hashlib, json, time, datetime as dt
 from sqlalchemy import select
 from ..db.db import SessionLocal
-from ..db.models import Company, Job
-from ..llm.ollama_client import extract_company_emails  
-from typing import Optional, Set
+from ..db.models import BoardFetchState
+from ..db.contacts import contact_rows, fit_contact_email, replace_contacts, split_emails
+from ..db.rollup import record_jobs_found
+from ..db.upsert import UpsertCounts, upsert_jobs, upsert_companies as bulk_upsert_companies
+from .email_candidates import registrable_domain
+from .enrich_emails import EXCLUDE_TERMS, EnrichmentThread, backfill_domains, cached_emails
+from .fetch import BoardFetcher, INGEST_CONCURRENCY, INGEST_PER_HOST
+from .normalize import normalize_posting
+from ..match.skills import SENIOR_NEG_RX, job_index
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+SEED_PATH = "src/ingest/k-companies_seed.yaml"
+JOB_BATCH_SIZE = int(os.getenv("INGEST_JOB_BATCH_SIZE", "500"))  # job rows per INSERT ... ON CONFLICT
 
 JR = re.compile(r'\b(entry|junior|new\s*grad|intern(ship)?|0\s*[-–]?\s*2\s*years|1[-–]2\s*years)\b', re.I)
 
@@ -11,12 +23,10 @@ EMAIL_RX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 
 def extract_contact_email(jd_raw: str, raw_json: dict, company: str, ollama_emails: str) -> Optional[str]:
     """
-    Extract contact email by first checking local JD/JSON, then using Ollama for company emails.
+    Extract contact email by first checking local JD/JSON, then the cached company emails.
     Returns consolidated comma-separated string of unique emails.
     """
-    # Define exclusion terms
-    exclude_terms = ["accommodat", "access", "compliance", "dpo", "security", 
-                    "humans", "people-team", "g.biow", "support", "benefit"]
+    exclude_terms = EXCLUDE_TERMS
     
     found_emails = set()
     
@@ -59,156 +69,287 @@ def extract_contact_email(jd_raw: str, raw_json: dict, company: str, ollama_emai
         return ','.join(sorted(found_emails))
     return None
 
+# Markup handling for clean_html_text; block tags go first, as in the original regex chain
+BLOCK_CLOSE_RX = re.compile(r'</(?:div|p|li|h[1-6]|br|ul|ol)>', re.IGNORECASE)
+BLOCK_OPEN_RX = re.compile(r'<(?:div|p|li|h[1-6]|br|ul|ol)[^>]*>', re.IGNORECASE)
+MARKUP_RX = re.compile(r'<[^>]+>|&[a-zA-Z]+;')  # remaining tags and unknown entities
+ENTITY_START_RX = re.compile(r'&[#a-zA-Z]')       # html.unescape is a no-op without one
+HYPHENS_RX = re.compile(r'-{2,}')
+
+# Entities common in ATS payloads, resolved with str.replace; '&amp;' must stay last
+# so that one round unescapes one level, like html.unescape
+COMMON_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&#39;", "'"), ("&nbsp;", "\xa0"),
+                   ("&rsquo;", "’"), ("&lsquo;", "‘"), ("&rdquo;", "”"), ("&ldquo;", "“"),
+                   ("&mdash;", "—"), ("&ndash;", "–"), ("&hellip;", "…"), ("&bull;", "•"),
+                   ("&amp;", "&"))
+
+def _unescape_all(text: str) -> str:
+    """html.unescape repeated to a fixpoint (&amp;lt; -> &lt; -> <), with a fast path for common entities."""
+    while '&' in text:
+        unescaped = text
+        for entity, char in COMMON_ENTITIES:
+            if entity in unescaped:
+                unescaped = unescaped.replace(entity, char)
+        if ENTITY_START_RX.search(unescaped):
+            unescaped = html.unescape(unescaped)
+        if unescaped == text:
+            break
+        text = unescaped
+    return text
+
+@lru_cache(maxsize=256)
 def clean_html_text(text):
+    """
+    Plain text from an ATS HTML description: entities unescaped, tags removed,
+    dashes normalised to '-', whitespace collapsed. Memoized, so the filter and
+    the stored jd_text share one cleaning per posting.
+    """
     if not text:
         return ""
     
-    # HTML unescaping
-    prev_text = ""
-    while prev_text != text:
-        prev_text = text
-        text = html.unescape(text)
+    text = _unescape_all(text)
     
-    # Replace HTML elements with spaces
-    text = re.sub(r'</(div|p|li|h[1-6]|br|ul|ol)>', ' ', text, flags=re.IGNORECASE)
-    text = re.sub(r'<(div|p|li|h[1-6]|br|ul|ol)[^>]*>', ' ', text, flags=re.IGNORECASE)
+    # Replace HTML elements and leftover named entities with spaces
+    if '<' in text:
+        text = BLOCK_CLOSE_RX.sub(' ', text)
+        text = BLOCK_OPEN_RX.sub(' ', text)
+    if '<' in text or '&' in text:
+        text = MARKUP_RX.sub(' ', text)
     
-    # Remove all other HTML tags
-    text = re.sub(r'<[^>]+>', ' ', text)
+    # Convert em-dash, en-dash, minus to hyphens and collapse runs
+    text = text.replace('—', '-').replace('–', '-').replace('−', '-')
+    if '--' in text:
+        text = HYPHENS_RX.sub('-', text)
     
-    # Convert specific dash types to standard hyphens
-    text = re.sub(r'[—–−]', '-', text)  # Replace em-dash, en-dash, minus with hyphen
-    
-    # Optionally collapse multiple hyphens
-    text = re.sub(r'-{2,}', '-', text)
-    
-    # Handle HTML entities and whitespace
-    text = re.sub(r'&nbsp;', ' ', text)
-    text = re.sub(r'&[a-zA-Z]+;', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\n\s*\n+', '\n', text)
-    
-    return text.strip()
-
-def junior_ok(title, jd): 
-    clean_title = clean_html_text(title)
-    clean_jd = clean_html_text(jd)
-    return bool(JR.search((clean_title or "") + "\n" + (clean_jd or "")))
-
-def upsert_company(session, c):
-    db = session.query(Company).filter_by(name=c["name"]).one_or_none()
-    if not db:
-        db = Company(**c)
-        session.add(db)
-        session.flush()
-    return db
-
-def run():
-    with open("src/ingest/k-companies_seed.yaml") as f:
+    # Collapse whitespace (same character set as \s)
+    return ' '.join(text.split())
+
+# Every JR match contains one of these fragments, so raw text without any of them can be rejected uncleaned
+RAW_JR_HINT_RX = re.compile(r'entry|junior|grad|intern|year', re.I)
+
+@dataclass
+class StageStats:
+    seen: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+class JuniorFilter:
+    """
+    Tiered junior-role filter, cheapest evidence first:
+      1. title:     junior/entry/intern... title -> accept; senior/staff/principal/lead -> reject
+      2. prefilter: raw JD without any JR fragment -> reject, without cleaning it
+      3. full:      JR over the cleaned title + JD (the original junior_ok rule)
+    `stats` counts, per stage, the postings it saw and decided and the time spent.
+    """
+
+    STAGES = ("title", "prefilter", "full")
+
+    def __init__(self):
+        self.stats = {stage: StageStats() for stage in self.STAGES}
+
+    def _stage(self, stage: str, t0: float, verdict: Optional[bool]) -> Optional[bool]:
+        st = self.stats[stage]
+        st.seen += 1
+        st.seconds += time.perf_counter() - t0
+        if verdict is True:
+            st.accepted += 1
+        elif verdict is False:
+            st.rejected += 1
+        return verdict
+
+    def __call__(self, title, jd) -> bool:
+        t0 = time.perf_counter()
+        clean_title = clean_html_text(title)
+        verdict = True if JR.search(clean_title) else False if SENIOR_NEG_RX.search(clean_title) else None
+        if self._stage("title", t0, verdict) is not None:
+            return verdict
+
+        t0 = time.perf_counter()
+        if self._stage("prefilter", t0, None if RAW_JR_HINT_RX.search(jd or "") else False) is False:
+            return False
+
+        t0 = time.perf_counter()
+        return self._stage("full", t0, bool(JR.search(clean_title + "\n" + clean_html_text(jd))))
+
+    def report(self):
+        print("Junior filter stages:")
+        for stage, st in self.stats.items():
+            print(f"  {stage:<9} seen {st.seen:>6}  accepted {st.accepted:>6}  "
+                  f"rejected {st.rejected:>6}  {st.seconds * 1000:8.1f} ms")
+
+# Shared by junior_ok callers; run() keeps its own filter so each ingest reports its own stage stats
+JUNIOR_FILTER = JuniorFilter()
+
+def junior_ok(title, jd):
+    return JUNIOR_FILTER(title, jd)
+
+def upsert_companies(session, companies: list) -> dict:
+    """Bulk-insert seed companies (filling in their domain) and return name -> Company."""
+    rows = [{**c, "domain": c.get("domain") or registrable_domain(c.get("website"))}
+            for c in companies]
+    by_name = bulk_upsert_companies(session, rows)
+    for c in rows:
+        db = by_name[c["name"]]
+        if not db.domain and c["domain"]:
+            db.domain = c["domain"]
+    return by_name
+
+def posting_hash(j: dict) -> str:
+    return hashlib.sha1(json.dumps(j, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def load_fetch_states(session, by_name: dict) -> dict:
+    """company name -> previous fetch state, in the shape BoardFetcher.fetch_all expects."""
+    rows = {st.company_id: st for st in session.scalars(select(BoardFetchState))}
+    states = {}
+    for name, company in by_name.items():
+        st = rows.get(company.id)
+        if st is not None:
+            states[name] = {
+                "etag": st.etag,
+                "last_modified": st.last_modified,
+                "content_hash": st.content_hash,
+                "posting_hashes": st.posting_hashes or {},
+            }
+    return states
+
+def save_fetch_state(session, company, page, posting_hashes: dict):
+    st = session.get(BoardFetchState, company.id)
+    if st is None:
+        st = BoardFetchState(company_id=company.id)
+        session.add(st)
+    st.etag = page.etag
+    st.last_modified = page.last_modified
+    st.content_hash = page.content_hash
+    st.posting_hashes = posting_hashes
+    st.fetched_at = dt.datetime.utcnow()
+
+def build_job_row(company, p: dict, company_emails: Optional[str], accept=junior_ok) -> Optional[dict]:
+    """Filter one normalized posting and return its jobs row, or None if it is not a junior role."""
+    if not accept(p["title"], p["jd_raw"]):
+        return None
+
+    jd_clean = clean_html_text(p["jd_raw"])  # memoized: free if the filter already cleaned it
+    return {
+        "company_id": company.id,
+        "title": p["title"],
+        "jd_text": jd_clean,
+        "url": p["url"],
+        "location": p["location"],
+        "posted_at": p["posted_at"],
+        "source": p["source"],
+        "raw_json": p["raw_json"],
+        "contact_email": extract_contact_email(p["jd_raw"], p["raw_json"], company.name, company_emails),
+        **job_index(p["title"], p["location"], jd_clean),
+    }
+
+def job_contact_rows(emails_by_url: dict, ids: dict, company_emails: Optional[str]) -> list:
+    """job_contacts rows for the job rows just written; both dicts are keyed by url (ids -> job id)."""
+    from_company = set(split_emails(company_emails))
+    out = []
+    for url, contact_email in emails_by_url.items():
+        job_id = ids.get(url)
+        if job_id is None:
+            continue
+        emails = split_emails(contact_email)
+        out += contact_rows(job_id, [e for e in emails if e not in from_company], "posting")
+        out += contact_rows(job_id, [e for e in emails if e in from_company], "company")
+    return out
+
+def run(seed_path: str = SEED_PATH, concurrency: int = INGEST_CONCURRENCY, per_host: int = INGEST_PER_HOST,
+        enrich: bool = False, full: bool = False):
+    with open(seed_path) as f:
         data = yaml.safe_load(f)
 
     companies = data["companies"]
+    fetcher = BoardFetcher(max_workers=concurrency, per_host=per_host)
 
     s = SessionLocal()
     try:
-        for c in companies:
-            company = upsert_company(s, c)
-            s.commit()
+        by_name = upsert_companies(s, companies)
+        s.commit()
+
+        # Previous fetch state drives conditional requests and per-posting skips (--full ignores it)
+        states = {} if full else load_fetch_states(s, by_name)
+        boards_skipped = postings_skipped = postings_checked = 0
+        totals = UpsertCounts()
+        junior_filter = JuniorFilter()
+
+        # Email lookup runs off the ingest path; ingest only ever reads the domain cache.
+        enricher = EnrichmentThread() if enrich else None
+        if enricher:
+            enricher.start()
+
+        # Boards download concurrently; DB writes stay on this thread as each board lands.
+        for c, page, err in fetcher.fetch_all(companies, states):
+            company = by_name[c["name"]]
             print(f"Processing company: {company.name} ({company.ats_type})")
-            ollama_emails = None
-            if company.website:
-                ollama_emails = extract_company_emails(company.name, company.website)
-            print(f"Extracted company emails: {ollama_emails} ")
-            
-            if c["ats_type"] == "greenhouse":
-                url = f"https://boards-api.greenhouse.io/v1/boards/{c['ats_slug']}/jobs?content=true"
-                try:
-                    jobs = requests.get(url, timeout=30).json().get("jobs", [])
-                except (requests.RequestException, ValueError) as e:
-                    print(f"Error fetching jobs from {company.name}: {e}")
-                    continue
-                    
-                for j in jobs:
-                    title = j["title"]
-                    jd_raw = j.get("content", "")
-                    
-                    if not junior_ok(title, jd_raw): 
-                        continue
-                    
-                    # Clean once for storage
-                    jd_clean = clean_html_text(jd_raw)
-                    url_job = j["absolute_url"]
-                    loc = (j.get("location") or {}).get("name")
-                    posted = j.get("updated_at")
-                    contact_email = extract_contact_email(jd_raw, j,company.name, ollama_emails)
-
-                    if not s.query(Job).filter_by(url=url_job).first():
-                        print(f"Found junior job: {title}")
-                        print(f"Clean preview: {jd_clean[:200]}...")
-                        print("-" * 60)
-                        
-                        s.add(Job(
-                            company_id=company.id, 
-                            title=title, 
-                            jd_text=jd_clean, 
-                            url=url_job,
-                            location=loc, 
-                            posted_at=dt.datetime.fromisoformat(posted.replace("Z", "+00:00")) if posted else None,
-                            source="greenhouse", 
-                            raw_json=j,
-                            contact_email=contact_email,  
-                        ))
-                        
-            elif c["ats_type"] == "lever":
-                url = f"https://api.lever.co/v0/postings/{c['ats_slug']}?mode=json"
-                try:
-                    resp = requests.get(url, timeout=30).json()
-                except (requests.RequestException, ValueError) as e:
-                    print(f"Error fetching jobs from {company.name}: {e}")
-                    continue
-                
-                if isinstance(resp, dict):
-                    jobs = resp.get("postings") or resp.get("jobs") or []
-                elif isinstance(resp, list):
-                    jobs = resp
-                else:
-                    print(f"Unexpected response format from {company.name}")
+            if err is not None:
+                print(f"Error fetching jobs from {company.name}: {err}")
+                continue
+            if page.not_modified:
+                boards_skipped += 1
+                print(f"Board unchanged since last fetch: {company.name}")
+                continue
+
+            company_emails = cached_emails(s, company.domain)
+            print(f"Cached company emails: {company_emails} ")
+
+            seen = (states.get(c["name"]) or {}).get("posting_hashes", {})
+            posting_hashes = {}
+            rows = []
+            for j in page.postings:
+                p = normalize_posting(c["ats_type"], j)
+                h = posting_hash(j)
+                posting_hashes[p["url"]] = h
+                # Only new or edited postings go through cleaning and filtering
+                if seen.get(p["url"]) == h:
+                    postings_skipped += 1
                     continue
+                postings_checked += 1
+                row = build_job_row(company, p, company_emails, accept=junior_filter)
+                if row is not None:
+                    rows.append(row)
 
-                for j in jobs:
-                    title = j.get("text", "")
-                    jd_raw = j.get("description", "")
-                    
-                    if not junior_ok(title, jd_raw): 
-                        continue
-                    
-                    # Clean once for storage
-                    jd_clean = clean_html_text(jd_raw)
-                    url_job = j["hostedUrl"]
-                    loc = (j.get("categories") or {}).get("location")
-                    posted_ms = j.get("createdAt")
-                    posted = dt.datetime.utcfromtimestamp(posted_ms/1000) if posted_ms else None
-                    contact_email = extract_contact_email(jd_raw, j,company.name, ollama_emails)
-
-                    if not s.query(Job).filter_by(url=url_job).first():
-                        print(f"Found junior job: {title}")
-                        print(f"Clean preview: {jd_clean[:200]}...")
-                        print("-" * 60)
-                        
-                        s.add(Job(
-                            company_id=company.id, 
-                            title=title, 
-                            jd_text=jd_clean, 
-                            url=url_job,
-                            location=loc, 
-                            posted_at=posted, 
-                            source="lever", 
-                            raw_json=j,
-                            contact_email=contact_email,  
-                        ))
+            # every address goes to job_contacts; jobs.contact_email keeps what fits its 255 chars
+            emails_by_url = {row["url"]: row["contact_email"] for row in rows}
+            # one timestamp for the rows and their daily_stats count (updates keep the first created_at)
+            stored_at = dt.datetime.utcnow()
+            for row in rows:
+                row["contact_email"] = fit_contact_email(row["contact_email"])
+                row["created_at"] = stored_at
+            counts = upsert_jobs(s, rows, batch_size=JOB_BATCH_SIZE)
+            replace_contacts(s, counts.ids.values(), job_contact_rows(emails_by_url, counts.ids, company_emails))
+            record_jobs_found(s, counts.inserted, day=stored_at.date())
+            totals += counts
+            print(f"Junior jobs: {counts.inserted} new, {counts.updated} updated, {counts.unchanged} unchanged")
+            save_fetch_state(s, company, page, posting_hashes)
             s.commit()
+
+        print(f"Boards unchanged: {boards_skipped}, postings unchanged: {postings_skipped}, "
+              f"postings checked: {postings_checked}")
+        print(f"Jobs inserted: {totals.inserted}, updated: {totals.updated}, unchanged: {totals.unchanged}")
+        junior_filter.report()
+
+        if enricher:
+            enricher.join()
+            # Jobs stored while their domain was being looked up missed the backfill
+            backfill_domains(enricher.enriched)
     finally:
         s.close()
 
+def main():
+    ap = argparse.ArgumentParser(description="Ingest Greenhouse/Lever boards for the seeded companies.")
+    ap.add_argument("--seed", type=str, default=SEED_PATH)
+    ap.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="Boards fetched in parallel")
+    ap.add_argument("--per-host", type=int, default=INGEST_PER_HOST, help="Max parallel requests per ATS host")
+    ap.add_argument("--enrich", action="store_true",
+                    help="Also look up uncached company emails in the background")
+    ap.add_argument("--full", action="store_true",
+                    help="Ignore saved fetch state and re-process every board and posting")
+    args = ap.parse_args()
+    run(seed_path=args.seed, concurrency=args.concurrency, per_host=args.per_host,
+        enrich=args.enrich, full=args.full)
+
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    main()
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable, Iterator, Optional, Union
+
+import requests
+
+from ..services.http import ThreadLocalSessions
+from .throttle import record_wait
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")                     # ollama | openai | fake
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "300"))                 # seconds per request
+LLM_BACKEND_CONCURRENCY = int(os.getenv("LLM_BACKEND_CONCURRENCY", "4"))  # requests in flight per backend
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8000/v1")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+
+def _reply(content: str, done: bool = True, **stats) -> SimpleNamespace:
+    """Backend-neutral reply with the `.message.content` shape of ollama's ChatResponse."""
+    return SimpleNamespace(message=SimpleNamespace(content=content), done=done, **stats)
+
+
+class Backend:
+    """
+    A chat-completion server. chat() mirrors ollama.chat: it returns a reply with
+    `.message.content` (plus eval/prompt_eval stats when the server reports them),
+    or an iterator of such chunks when stream=True. At most `max_concurrency`
+    requests are in flight per backend; a stream holds its slot until it is
+    exhausted or closed.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int = LLM_BACKEND_CONCURRENCY, timeout: float = LLM_TIMEOUT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def chat(self, model: str, messages: list, format=None, stream: bool = False,
+             options: Optional[dict] = None, keep_alive: Union[str, float, None] = None):
+        if stream:
+            return self._held_stream(model, messages, format, options, keep_alive)
+        with self._slot():
+            return self._complete(model, messages, format, options or {}, keep_alive)
+
+    @contextmanager
+    def _slot(self):
+        t0 = time.monotonic()
+        with self._slots:
+            record_wait(time.monotonic() - t0)
+            yield
+
+    def _held_stream(self, model, messages, format, options, keep_alive) -> Iterator:
+        with self._slot():
+            stream = self._stream(model, messages, format, options or {}, keep_alive)
+            try:
+                yield from stream
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+
+    def _complete(self, model, messages, format, options, keep_alive):
+        raise NotImplementedError
+
+    def _stream(self, model, messages, format, options, keep_alive) -> Iterator:
+        raise NotImplementedError
+
+
+class OllamaBackend(Backend):
+    """Ollama's HTTP API through one ollama.Client, whose httpx pool keeps connections alive."""
+
+    name = "ollama"
+
+    def __init__(self, host: str = OLLAMA_HOST, **kwargs):
+        super().__init__(**kwargs)
+        from ollama import Client
+        self.client = Client(host=host, timeout=self.timeout)
+
+    def _complete(self, model, messages, format, options, keep_alive):
+        return self.client.chat(model=model, messages=messages, format=format, stream=False,
+                                options=options, keep_alive=keep_alive)
+
+    def _stream(self, model, messages, format, options, keep_alive):
+        return self.client.chat(model=model, messages=messages, format=format, stream=True,
+                                options=options, keep_alive=keep_alive)
+
+
+class OpenAICompatBackend(Backend):
+    """
+    Any server exposing /v1/chat/completions (llama.cpp server, vLLM, LM Studio, ...).
+    Ollama-style options are mapped to their OpenAI names; the rest are dropped.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str = OPENAI_BASE_URL, api_key: str = OPENAI_API_KEY, **kwargs):
+        super().__init__(**kwargs)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self._sessions = ThreadLocalSessions(
+            pool_maxsize=self.max_concurrency,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+        )
+
+    def _http(self) -> requests.Session:
+        return self._sessions.get()
+
+    def _payload(self, model, messages, format, options, stream: bool) -> dict:
+        payload = {"model": model, "messages": messages, "stream": stream}
+        for src, dst in (("temperature", "temperature"), ("top_p", "top_p"), ("num_predict", "max_tokens")):
+            if src in options:
+                payload[dst] = options[src]
+        if isinstance(format, dict):
+            payload["response_format"] = {"type": "json_schema", "json_schema": {"name": "output", "schema": format}}
+        elif format == "json":
+            payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _complete(self, model, messages, format, options, keep_alive):
+        r = self._http().post(self.url, json=self._payload(model, messages, format, options, False),
+                              timeout=(10, self.timeout))
+        r.raise_for_status()
+        data = r.json()
+        usage = data.get("usage") or {}
+        return _reply(data["choices"][0]["message"].get("content") or "",
+                      eval_count=usage.get("completion_tokens"),
+                      prompt_eval_count=usage.get("prompt_tokens"))
+
+    def _stream(self, model, messages, format, options, keep_alive):
+        r = self._http().post(self.url, json=self._payload(model, messages, format, options, True),
+                              timeout=(10, self.timeout), stream=True)
+        r.raise_for_status()
+        usage = {}
+        try:
+            for line in r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                usage = event.get("usage") or usage
+                for choice in event.get("choices") or []:
+                    piece = (choice.get("delta") or {}).get("content")
+                    if piece:
+                        yield _reply(piece, done=False)
+            yield _reply("", eval_count=usage.get("completion_tokens"),
+                         prompt_eval_count=usage.get("prompt_tokens"))
+        finally:
+            r.close()
+
+
+class FakeBackend(Backend):
+    """
+    In-process backend for tests and dry runs. `reply` is a fixed string or a
+    callable (model, messages, format) -> str; by default a schema request gets
+    a placeholder object with every required field. Requests are kept in `.calls`.
+    """
+
+    name = "fake"
+
+    def __init__(self, reply: Union[str, Callable, None] = None, chunk_size: int = 16, **kwargs):
+        super().__init__(**kwargs)
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    @staticmethod
+    def _placeholder(format) -> str:
+        if not isinstance(format, dict):
+            return "{}" if format == "json" else "ok"
+        out = {}
+        for name in format.get("required", []):
+            kind = format.get("properties", {}).get(name, {}).get("type")
+            out[name] = [] if kind == "array" else 0 if kind == "integer" else f"<{name}>"
+        return json.dumps(out)
+
+    def _content(self, model, messages, format) -> str:
+        self.calls.append({"model": model, "messages": messages, "format": format})
+        if callable(self.reply):
+            return self.reply(model, messages, format)
+        return self.reply if self.reply is not None else self._placeholder(format)
+
+    def _complete(self, model, messages, format, options, keep_alive):
+        content = self._content(model, messages, format)
+        return _reply(content, eval_count=len(content.split()), prompt_eval_count=0)
+
+    def _stream(self, model, messages, format, options, keep_alive):
+        content = self._content(model, messages, format)
+        for i in range(0, len(content), self.chunk_size):
+            yield _reply(content[i:i + self.chunk_size], done=False)
+        yield _reply("", eval_count=len(content.split()), prompt_eval_count=0)
+
+
+BACKENDS = {"ollama": OllamaBackend, "openai": OpenAICompatBackend, "fake": FakeBackend}
+
+_backend: Optional[Backend] = None
+_backend_lock = threading.Lock()
+
+
+def set_backend(backend: Optional[Backend]):
+    """Replace the process-wide backend (e.g. a FakeBackend in tests); None re-reads LLM_BACKEND."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_backend() -> Backend:
+    """The process-wide backend selected by LLM_BACKEND, created on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                _backend = BACKENDS[LLM_BACKEND]()
+            except KeyError:
+                raise ValueError(f"Unknown LLM_BACKEND {LLM_BACKEND!r}; expected one of {sorted(BACKENDS)}")
+        return _backend
@@ -0,0 +1,96 @@
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+from ..match.skills import MATCHER
+from .length import keywords
+
+LLM_JD_TOKEN_BUDGET = int(os.getenv("LLM_JD_TOKEN_BUDGET", "500"))
+LLM_RESUME_TOKEN_BUDGET = int(os.getenv("LLM_RESUME_TOKEN_BUDGET", "500"))
+
+SEGMENT_RX = re.compile(r"(?<=[.!?;:])\s+(?=[A-Z0-9•·*(-])|\s*[\n•·]+\s*|\s+[-*]\s+(?=[A-Z])")
+MAX_SEGMENT_WORDS = 60
+
+# Whole phrases from EEO statements, benefits, accommodation and legal notices. Bare stems
+# ("discriminat", "accommodat", "benefit", "dental") would also hit real requirements such as
+# "discriminative models", "accommodate high traffic" or "dental imaging".
+BOILERPLATE_RX = re.compile(
+    r"equal (?:employment )?opportunity(?: employer)?|\beeo\b|affirmative action"
+    r"|without regard to|regardless of (?:race|sex|gender|age|religion)|(?:does|do|will) not discriminate"
+    r"|sexual orientation|gender identity|national origin|protected (?:veteran|class|status)"
+    r"|reasonable accommodations?|accommodations? (?:during|for|in) (?:the |our )?(?:application|interview|hiring)"
+    r"|individuals with disabilities|e-verify|(?:pass|undergo|subject to) a background check"
+    r"|(?:our|applicant|candidate) privacy (?:policy|notice)"
+    r"|benefits (?:include|package)|(?:our|comprehensive|competitive) benefits|401\(?k\)?"
+    r"|health insurance (?:plans?|coverage)|medical, dental|vision insurance|paid time off|\bpto\b|parental leave"
+    r"|wellness (?:stipend|program|benefits?)|(?:learning|home office|remote work|wfh) stipend|\bperks\b",
+    re.I,
+)
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+def segments(text: str) -> List[str]:
+    """Split cleaned text into sentences / bullet items, cutting run-on items into bounded pieces."""
+    out = []
+    for seg in SEGMENT_RX.split(text or ""):
+        words = seg.split()
+        for i in range(0, len(words), MAX_SEGMENT_WORDS):
+            out.append(" ".join(words[i:i + MAX_SEGMENT_WORDS]))
+    return [s for s in out if s]
+
+
+def _fill(segs: List[str], scores: List[float], budget: int, keep_first: bool) -> List[str]:
+    """Best-scoring segments that fit `budget` tokens, in their original order."""
+    chosen, used = set(), 0
+    order = sorted(range(len(segs)), key=lambda i: (-scores[i], i))
+    if keep_first and segs:
+        order.remove(0)
+        order.insert(0, 0)
+    for i in order:
+        cost = approx_tokens(segs[i]) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(i)
+        used += cost
+    return [segs[i] for i in sorted(chosen)]
+
+
+def condense_jd(jd_text: str, resume_text: str = "", budget: int = LLM_JD_TOKEN_BUDGET) -> str:
+    """
+    Fit a job description into `budget` tokens. A JD that already fits is returned
+    whole; otherwise boilerplate sentences go first, then the opening sentence and
+    the ones with the most catalog skills and resume overlap per token are kept,
+    in their original order.
+    """
+    segs = segments(jd_text)
+    if sum(approx_tokens(s) + 1 for s in segs) <= budget:
+        return " ".join(segs)
+    segs = [s for s in segs if not BOILERPLATE_RX.search(s)]
+    if sum(approx_tokens(s) + 1 for s in segs) <= budget:
+        return " ".join(segs)
+    resume_kw = keywords(resume_text)
+    scores = []
+    for s in segs:
+        skill_weight = sum(MATCHER.find(s).values())
+        overlap = len(keywords(s) & resume_kw)
+        scores.append((2.0 * skill_weight + overlap) / approx_tokens(s) ** 0.5)
+    return " ".join(_fill(segs, scores, budget, keep_first=True))
+
+
+@lru_cache(maxsize=8)
+def condense_resume(resume_text: str, budget: int = LLM_RESUME_TOKEN_BUDGET) -> str:
+    """
+    Fit the resume into `budget` tokens, ranking lines by catalog skills only. It
+    deliberately ignores the job so the prompt prefix stays identical across drafts.
+    """
+    lines = [ln.strip() for ln in (resume_text or "").splitlines() if ln.strip()]
+    if sum(approx_tokens(ln) + 1 for ln in lines) <= budget:
+        return "\n".join(lines)
+    segs = [seg for ln in lines for seg in segments(ln)]
+    scores = [sum(MATCHER.find(s).values()) / approx_tokens(s) ** 0.5 for s in segs]
+    return "\n".join(_fill(segs, scores, budget, keep_first=True))
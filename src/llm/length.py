@@ -0,0 +1,89 @@
+import re
+from typing import Iterable, List, Optional, Pattern, Set
+
+# Opening line ("Dear Hiring Manager,") and closing block ("Best regards, ..." + signature)
+# are never pruned
+SALUTATION_RX = re.compile(r"^\s*(?:Dear|Hi|Hello)\b[^\n]*\n", re.I)
+CLOSING_RX = re.compile(
+    r"^[ \t]*(?:Best regards|Kind regards|Warm regards|Regards|Sincerely|Best|Thanks|Thank you)\b[^\n]{0,20}$",
+    re.I | re.M,
+)
+PARAGRAPH_RX = re.compile(r"\n\s*\n")
+SENTENCE_RX = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+TOKEN_RX = re.compile(r"[a-z][a-z0-9+#.-]{2,}")
+
+STOPWORDS = frozenset("""
+about above after also and any are around based been being both but can company could
+day each etc every for from have help how including into its join just like make more
+most must our out over per role should some such team than that the their them then
+there these they this those through using very was well were what when where which
+while who will with within work would years you your
+""".split())
+
+
+def _words(s: str) -> int:
+    return len(s.split())
+
+
+def keywords(text: str) -> Set[str]:
+    """Lower-cased content words of a job description, used to rank sentences by relevance."""
+    return {t.strip(".-") for t in TOKEN_RX.findall((text or "").lower())} - STOPWORDS
+
+
+def _split(text: str):
+    """(head, body, tail): salutation line, prunable body, closing + signature."""
+    head = ""
+    m = SALUTATION_RX.match(text)
+    if m:
+        head, text = text[:m.end()], text[m.end():]
+    tail = ""
+    closings = list(CLOSING_RX.finditer(text))
+    if closings:
+        start = closings[-1].start()
+        text, tail = text[:start], text[start:]
+    return head, text, tail
+
+
+def trim_to_range(text: str, min_words: int, max_words: int, jd_keywords: Iterable[str] = (),
+                  keep: Optional[Pattern] = None) -> str:
+    """
+    Shorten `text` to at most `max_words` words by dropping whole sentences, least
+    relevant first: fewest JD keywords per word, later sentences before earlier ones.
+    The salutation, the closing/signature block, the first body sentence and any
+    sentence matching `keep` are kept, and a sentence is skipped if dropping it
+    would go below `min_words`.
+    Text already within the limit is returned unchanged.
+    """
+    total = _words(text)
+    if total <= max_words:
+        return text
+
+    kw = set(jd_keywords)
+    head, body, tail = _split(text)
+    paragraphs: List[List[str]] = [SENTENCE_RX.split(p.strip()) for p in PARAGRAPH_RX.split(body.strip()) if p.strip()]
+
+    ranked = []
+    for pi, sentences in enumerate(paragraphs):
+        for si, sent in enumerate(sentences):
+            if (pi == 0 and si == 0) or (keep is not None and keep.search(sent)):
+                continue
+            n = _words(sent)
+            hits = len(keywords(sent) & kw)
+            ranked.append((hits / max(n, 1), -pi, -si, pi, si, n))
+    ranked.sort()
+
+    dropped = set()
+    for *_, pi, si, n in ranked:
+        if total <= max_words:
+            break
+        if total - n < min_words:
+            continue
+        dropped.add((pi, si))
+        total -= n
+
+    kept = [
+        " ".join(s for si, s in enumerate(sentences) if (pi, si) not in dropped)
+        for pi, sentences in enumerate(paragraphs)
+    ]
+    new_body = "\n\n".join(p for p in kept if p)
+    return "\n\n".join(part for part in (head.strip(), new_body, tail.strip()) if part)
@@ -0,0 +1,58 @@
+import statistics
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# Derived rates reported by summary(): name -> (numerator counter, denominator counter)
+RATES = {
+    "revision_call_rate": ("revision_calls", "length_checks"),
+    "stream_abort_rate": ("stream_aborts", "drafts"),
+}
+
+
+class LLMMetrics:
+    """Thread-safe counters and timing samples for the LLM pipeline (per process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._samples: Dict[str, list] = defaultdict(list)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] += n
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self._samples[name].append(value)
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counts.get(name, 0)
+
+    def summary(self) -> dict:
+        with self._lock:
+            out = dict(self._counts)
+            for name, values in self._samples.items():
+                if values:
+                    out[name] = {
+                        "n": len(values),
+                        "mean": round(statistics.fmean(values), 3),
+                        "p50": round(statistics.median(values), 3),
+                        "max": round(max(values), 3),
+                    }
+            for name, (num, den) in RATES.items():
+                if self._counts.get(den):
+                    out[name] = round(self._counts.get(num, 0) / self._counts[den], 3)
+            return out
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print("[metrics] LLM summary:")
+        for name in sorted(summary):
+            print(f"  - {name}: {summary[name]}")
+
+
+METRICS = LLMMetrics()
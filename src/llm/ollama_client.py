@@ -1,16 +1,223 @@
-from typing import Dict
-from pydantic import ValidationError
-from ollama import chat
-from .templates import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, CoverLetterOut
 import json
+import os
 import re
-from typing import Optional
-from urllib.parse import urlparse
 import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from pydantic import ValidationError
+
+from .backends import get_backend
+from .cache import cache_key, get_cache
+from .condense import LLM_JD_TOKEN_BUDGET, approx_tokens, condense_jd, condense_resume
+from .length import keywords, trim_to_range
+from .metrics import METRICS
+from .templates import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, CoverLetterOut
+from .throttle import LLM_LIMITER
 
 
 SCHEMA = CoverLetterOut.model_json_schema()  # JSON Schema for structured outputs
 
+# How long Ollama keeps the model (and its prompt cache) loaded between requests
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Context window for every drafting request, single or batched. It must not vary:
+# Ollama reloads the model runner (dropping the cached prompt prefix) when num_ctx changes.
+LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "8192"))
+
+# The email's "also consider me for junior roles" sentence survives local trimming
+JUNIOR_ASK_RX = re.compile(r"junior|other positions|consider my resume|other roles", re.I)
+
+# Word range accepted for the combined generator's cover letter and email body
+MIN_DRAFT_WORDS = 100
+MAX_DRAFT_WORDS = 400
+
+def _cacheable(content: str, format) -> bool:
+    """Only keep usable completions: non-empty, and valid JSON when a schema was requested."""
+    if not content or not content.strip():
+        return False
+    if format is None:
+        return True
+    try:
+        json.loads(content)
+        return True
+    except ValueError:
+        return False
+
+def _record_prompt_eval(resp):
+    """Prompt tokens evaluated (i.e. not served from Ollama's prompt cache) and time spent on them."""
+    count = getattr(resp, "prompt_eval_count", None)
+    duration = getattr(resp, "prompt_eval_duration", None)
+    if count is not None:
+        METRICS.observe("prompt_eval_tokens", count)
+    if duration is not None:
+        METRICS.observe("prompt_eval_ms", duration / 1e6)
+
+def _chat(model: str, messages: list, format=None, stream: bool = False, options: Optional[dict] = None):
+    """
+    Chat call on the configured backend (see llm.backends) behind the persistent
+    response cache (see llm.cache). A cache hit
+    returns an object with the same `.message.content` shape without calling the model.
+    """
+    cache = get_cache()
+    key = cache_key(model, messages, format, options) if cache else None
+    if cache:
+        content = cache.get(key)
+        if content is not None:
+            METRICS.count("cache_hits")
+            return SimpleNamespace(message=SimpleNamespace(content=content), cached=True)
+
+    LLM_LIMITER.acquire()  # start rate only; requests in flight are capped by the backend
+    resp = get_backend().chat(model=model, messages=messages, format=format, stream=stream, options=options,
+                              keep_alive=KEEP_ALIVE)
+    _record_prompt_eval(resp)
+    if cache and _cacheable(resp.message.content, format):
+        cache.put(key, model, resp.message.content)
+    return resp
+
+class StreamAborted(Exception):
+    """Raised by _chat_stream when the partial output already fails validation."""
+
+class _StreamCheck:
+    """
+    Incremental validator for a streamed JSON object. feed() scans each new chunk
+    once, tracking just enough JSON state to count words inside the string values
+    of `fields`, and returns a reason string as soon as the output is hopeless:
+    it does not start with '{', or a watched field has passed `max_words`.
+    """
+
+    def __init__(self, fields=(), max_words: Optional[int] = None):
+        self.fields = set(fields)
+        self.max_words = max_words
+        self.started = False
+        self.depth = 0
+        self.in_str = False
+        self.esc = False
+        self.expect_key = False
+        self.is_key = False
+        self.buf = []           # chars of the key currently being read
+        self.key = None         # last key seen at the top level
+        self.field = None       # watched field whose value is being read
+        self.in_word = False
+        self.words: Dict[str, int] = {}
+
+    def _char(self, ch: str):
+        # word boundaries inside a watched value; escaped \n \t \r count as whitespace
+        space = ch.isspace()
+        if not space:
+            if not self.in_word:
+                self.words[self.field] = self.words.get(self.field, 0) + 1
+            self.in_word = True
+        else:
+            self.in_word = False
+
+    def feed(self, piece: str) -> Optional[str]:
+        for ch in piece:
+            if not self.started:
+                if ch.isspace():
+                    continue
+                if ch != "{":
+                    return f"output does not start with a JSON object ({ch!r})"
+                self.started = True
+
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                    if self.field:
+                        self._char(" " if ch in "ntr" else ch)
+                elif ch == "\\":
+                    self.esc = True
+                elif ch == '"':
+                    self.in_str = False
+                    if self.is_key:
+                        self.key = "".join(self.buf)
+                    self.field = None
+                elif self.is_key:
+                    self.buf.append(ch)
+                elif self.field:
+                    self._char(ch)
+                    if self.max_words and self.words.get(self.field, 0) > self.max_words:
+                        return f"{self.field} is over {self.max_words} words"
+                continue
+
+            if ch == '"':
+                self.in_str = True
+                self.is_key = self.depth == 1 and self.expect_key
+                self.buf = []
+                if self.is_key:
+                    self.expect_key = False
+                elif self.depth == 1 and self.key in self.fields:
+                    self.field = self.key
+                    self.in_word = False
+            elif ch in "{[":
+                self.depth += 1
+                self.expect_key = ch == "{" and self.depth == 1
+            elif ch in "}]":
+                self.depth -= 1
+            elif ch == "," and self.depth == 1:
+                self.expect_key = True
+        return None
+
+def _chat_stream(model: str, messages: list, format=None, options: Optional[dict] = None,
+                 check: Optional[_StreamCheck] = None):
+    """
+    Streaming variant of _chat. Chunks are passed to `check` as they arrive and
+    generation is abandoned with StreamAborted as soon as it reports a problem,
+    instead of paying for the rest of the completion. Records time-to-first-token
+    and tokens/sec in llm.metrics. Only completed streams are cached.
+    """
+    cache = get_cache()
+    key = cache_key(model, messages, format, options) if cache else None
+    if cache:
+        content = cache.get(key)
+        if content is not None:
+            METRICS.count("cache_hits")
+            return SimpleNamespace(message=SimpleNamespace(content=content), cached=True)
+
+    ttft = None
+    parts = []
+    final = None
+    chunks = 0
+    LLM_LIMITER.acquire()  # start rate only; requests in flight are capped by the backend
+    t0 = time.perf_counter()
+    stream = get_backend().chat(model=model, messages=messages, format=format, stream=True, options=options,
+                                keep_alive=KEEP_ALIVE)
+    try:
+        for chunk in stream:
+            piece = chunk.message.content or ""
+            if piece:
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                    METRICS.observe("ttft_s", ttft)
+                chunks += 1
+                parts.append(piece)
+                reason = check.feed(piece) if check else None
+                if reason:
+                    METRICS.count("stream_aborts")
+                    raise StreamAborted(reason)
+            if getattr(chunk, "done", False):
+                final = chunk
+    finally:
+        # closing the generator drops the HTTP response, which stops generation server-side
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+
+    elapsed = time.perf_counter() - t0
+    eval_count = getattr(final, "eval_count", None) or chunks
+    eval_ns = getattr(final, "eval_duration", None)
+    gen_s = eval_ns / 1e9 if eval_ns else elapsed - (ttft or 0.0)
+    if gen_s > 0:
+        METRICS.observe("tokens_per_s", eval_count / gen_s)
+    METRICS.observe("stream_s", elapsed)
+    _record_prompt_eval(final)
+
+    content = "".join(parts)
+    if cache and _cacheable(content, format):
+        cache.put(key, model, content)
+    return SimpleNamespace(message=SimpleNamespace(content=content), cached=False,
+                           ttft=ttft, eval_count=eval_count)
+
 def _word_count(s: str) -> int:
     return len((s or "").split())
 
@@ -29,7 +236,7 @@ def generate_cover_letter(company: str, title: str, jd_text: str, resume_text: s
     )
     print(user_prompt)
     # 1) First pass with strict schema
-    resp = chat(
+    resp = _chat(
         model=model,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -92,9 +299,16 @@ def generate_cover_letter(company: str, title: str, jd_text: str, resume_text: s
         fixed = re.sub(r"^```json|```$", "", content.strip(), flags=re.I|re.M)
         out = parse_out(fixed)
 
-    # 2) Enforce 180–220 words with a single revision if needed
+    # 2) Enforce 180–220 words: trim locally when too long, one revision round otherwise
+    METRICS.count("length_checks")
     wc = _word_count(out.cover_letter)
+    if wc > 220:
+        out.cover_letter = trim_to_range(out.cover_letter, 180, 220, keywords(jd_text))
+        METRICS.count("local_trims")
+        print(f"[LLM] Trimmed letter from {wc} to {_word_count(out.cover_letter)} words locally.")
+        wc = _word_count(out.cover_letter)
     if wc < 180 or wc > 220:
+        METRICS.count("revision_calls")
         target = 200
         revision_schema = {
             "type": "object",
@@ -106,7 +320,7 @@ def generate_cover_letter(company: str, title: str, jd_text: str, resume_text: s
             f"(target ≈ {target}). Keep all facts. Return ONLY JSON with 'cover_letter'.\n\n"
             f"---\n{out.cover_letter}\n---"
         )
-        rev = chat(
+        rev = _chat(
             model=model,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
@@ -154,7 +368,7 @@ Guidelines:
 {resume_text.strip()}
 """
 
-    resp = chat(
+    resp = _chat(
         model=model,
         messages=[
             {"role": "system", "content": "You are a helpful assistant that generates job application emails."},
@@ -171,15 +385,22 @@ Guidelines:
     content = resp.message.content.strip()
     print(f"[LLM] Raw email output: {content[:500]}...")
 
-    # Optional: enforce word count range
+    # Optional: enforce word count range (over-length is trimmed locally)
+    METRICS.count("length_checks")
     wc = _word_count(content)
+    if wc > 175:
+        content = trim_to_range(content, 125, 175, keywords(jd_text))
+        METRICS.count("local_trims")
+        print(f"[LLM] Trimmed email from {wc} to {_word_count(content)} words locally.")
+        wc = _word_count(content)
     if wc < 125 or wc > 175:
+        METRICS.count("revision_calls")
         print(f"[LLM] Email length {wc} words. Triggering revision to target 150.")
         revision_prompt = (
             f"Revise the following email to land between 125 and 175 words (target ≈ 150). "
             f"Keep all facts and tone. Return only the revised email text.\n\n---\n{content}\n---"
         )
-        rev = chat(
+        rev = _chat(
             model=model,
             messages=[
                 {"role": "system", "content": "You revise job application emails to meet length requirements."},
@@ -193,25 +414,58 @@ Guidelines:
 
     return content
 
-def generate_cover_letter_and_email_body(company: str, title: str, jd_text: str, resume_text: str,
-                         model: str = "llama3:8b",
-                         temperature: float = 0.3) -> CoverLetterOut:
-    """
-    Optimized for Ollama + Llama3 on multi-core Mac. Single call generates both cover letter and email.
-    Email body is formatted professionally with salutation, signature, and contact information.
-    """
-    # Streamlined prompt for better Llama3 comprehension
-    COMBINED_PROMPT = """Generate a job application package.
-
-CONTEXT: Applying for {title} at {company}
+# Ensure email body has proper formatting with signature
+def ensure_email_format(email_text: str) -> str:
+    """Ensure email has proper salutation, junior positions mention, and signature"""
+    email_text = email_text.strip()
+
+    # Ensure it starts with proper salutation
+    if not email_text.startswith(('Dear', 'Dear Hiring Manager', 'Dear Recruiter')):
+        email_text = f"Dear Hiring Manager,\n\n{email_text}"
+
+    # Ensure it includes the junior positions mention
+    junior_keywords = ['junior', 'other positions', 'consider my resume', 'other roles']
+    if not any(keyword in email_text.lower() for keyword in junior_keywords):
+        # Insert before the closing
+        if 'Best regards' in email_text:
+            parts = email_text.split('Best regards')
+            email_text = parts[0] + "\nPlease also consider my resume for any other junior software positions that may be available, as I am eager to contribute to your organization's success.\n\nBest regards" + parts[1]
+        else:
+            email_text += "\n\nPlease also consider my resume for any other junior software positions that may be available."
 
-JOB REQUIREMENTS:
-{jd_text}
+    # Ensure proper signature
+    signature = """<<REDACTED_NAME>>
+<<REDACTED_EMAIL>> | phone: <<REDACTED_PHONE>>
+<<REDACTED_LINKEDIN>>
+<<REDACTED_GITHUB>>"""
 
-MY BACKGROUND:
+    if signature not in email_text:
+        # Remove any existing signature and add the correct one
+        email_text = re.sub(r'(Best regards|Sincerely|Regards),?\s*\n.*$', '', email_text, flags=re.MULTILINE | re.DOTALL)
+        email_text = email_text.rstrip() + f'\n\nBest regards,\n\n{signature}'
+
+    return email_text
+
+def _trim_draft(out: CoverLetterOut, jd_text: str):
+    """Prune an over-length cover letter / email body in place (see llm.length)."""
+    jd_keywords = keywords(jd_text)
+    for field in ("cover_letter", "email_body"):
+        text = getattr(out, field)
+        if _word_count(text) > MAX_DRAFT_WORDS:
+            setattr(out, field, trim_to_range(text, MIN_DRAFT_WORDS, MAX_DRAFT_WORDS, jd_keywords,
+                                              keep=JUNIOR_ASK_RX))
+            METRICS.count("local_trims")
+            print(f"[TRIM] {field}: {_word_count(text)} -> {_word_count(getattr(out, field))} words")
+
+COMBINED_SYSTEM_PROMPT = "You are a career advisor. Provide concise, professional job application content. Return ONLY valid JSON."
+
+# The combined prompt is laid out stable-part first: system prompt, resume and
+# instructions are identical for every draft, so Ollama can reuse the evaluated
+# prefix (KV cache) and only evaluates the job-specific suffix per request.
+COMBINED_PREFIX = """MY BACKGROUND:
 {resume_text}
 
-Generate ONE output:
+For the job below, generate ONE output:
 
 1. EMAIL BODY (200 words): Professional email format that:
    - Starts with "Dear Hiring Manager,"
@@ -230,19 +484,48 @@ Return VALID JSON with these exact fields:
   "email_body": "full email body text here", 
   "match_summary": "2-3 sentence summary of qualifications match",
   "strengths": ["strength1"]
-}}"""
+}}
+"""
+
+COMBINED_SUFFIX = """
+Generate a job application package.
 
-#Generate TWO outputs:
-#1. COVER LETTER (200 words): Formal business letter format with full address header, date, and signature
+CONTEXT: Applying for {title} at {company}
 
-    user_prompt = COMBINED_PROMPT.format(
+JOB REQUIREMENTS:
+{jd_text}"""
+
+def combined_prefix(resume_text: str) -> str:
+    """The job-independent part of the combined prompt (resume condensed to LLM_RESUME_TOKEN_BUDGET)."""
+    return COMBINED_PREFIX.format(resume_text=condense_resume(resume_text.strip()))
+
+def combined_messages(company: str, title: str, jd_text: str, resume_text: str) -> list:
+    """Chat messages for the combined generator: shared prefix first, job-specific suffix last."""
+    prefix = combined_prefix(resume_text)
+    suffix = COMBINED_SUFFIX.format(
         company=company.strip(),
         title=title.strip(),
-        jd_text=jd_text.strip()[:2000],  # Limit input size
-        resume_text=resume_text.strip()[:2000]
+        jd_text=condense_jd(jd_text, resume_text),  # requirements first, boilerplate dropped
     )
+    return [
+        {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+        {"role": "user", "content": prefix + suffix},
+    ]
 
-    print(f"[DEBUG] Prompt sent to LLM: {user_prompt[:200]}...")
+def generate_cover_letter_and_email_body(company: str, title: str, jd_text: str, resume_text: str,
+                         model: str = "llama3:8b",
+                         temperature: float = 0.3,
+                         stream: bool = False) -> CoverLetterOut:
+    """
+    Optimized for Ollama + Llama3 on multi-core Mac. Single call generates both cover letter and email.
+    Email body is formatted professionally with salutation, signature, and contact information.
+    With stream=True the JSON is validated while it is generated: a reply that is not
+    JSON, or whose letter/email is already over the word budget, is cut off and
+    retried once with a stricter length instruction.
+    """
+    messages = combined_messages(company, title, jd_text, resume_text)
+    user_prompt = messages[-1]["content"]
+    print(f"[DEBUG] Job part of prompt: {user_prompt[user_prompt.index('CONTEXT:'):][:200]}...")
 
     # Ollama-optimized schema
     SCHEMA = {
@@ -257,24 +540,36 @@ Return VALID JSON with these exact fields:
     }
 
     # Ollama-optimized parameters for 16-core Mac
-    resp = chat(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a career advisor. Provide concise, professional job application content. Return ONLY valid JSON."},
-            {"role": "user", "content": user_prompt},
-        ],
-        format=SCHEMA,
-        stream=False,
-        options={
-            "temperature": temperature,
-            "num_predict": 1024,  # Increased for combined output
-            "top_k": 40,
-            "top_p": 0.9,
-            "repeat_penalty": 1.1,
-            "num_thread": 14,  # Utilize 14 cores (leaves 2 for system)
-            "num_gpu": 1,  # Use Metal acceleration if available
-        },
-    )
+    options = {
+        "temperature": temperature,
+        "num_predict": 1024,  # Increased for combined output
+        "top_k": 40,
+        "top_p": 0.9,
+        "repeat_penalty": 1.1,
+        "num_thread": 14,  # Utilize 14 cores (leaves 2 for system)
+        "num_gpu": 1,  # Use Metal acceleration if available
+        "num_ctx": LLM_NUM_CTX,  # same as batched drafts, so switching between them never reloads
+    }
+    METRICS.count("drafts")
+
+    if stream:
+        try:
+            resp = _chat_stream(model, messages, format=SCHEMA, options=options,
+                                check=_StreamCheck(("cover_letter", "email_body"), max_words=MAX_DRAFT_WORDS))
+        except StreamAborted as e:
+            print(f"[STREAM] Aborted: {e}. Retrying once.")
+            retry_messages = messages[:-1] + [{
+                "role": "user",
+                "content": user_prompt + "\n\nKeep cover_letter and email_body each to about 200 words.",
+            }]
+            try:
+                resp = _chat_stream(model, retry_messages, format=SCHEMA, options=options,
+                                    check=_StreamCheck())
+            except StreamAborted as e2:
+                print(f"[STREAM] Retry aborted: {e2}")
+                resp = SimpleNamespace(message=SimpleNamespace(content=""))
+    else:
+        resp = _chat(model=model, messages=messages, format=SCHEMA, stream=False, options=options)
 
     content = resp.message.content
     print(f"[DEBUG] Raw LLM response: {content}")
@@ -343,51 +638,25 @@ Best regards,
     out = fast_parse(content)
     print(f"[DEBUG] Parsed output - Cover letter words: {_word_count(out.cover_letter)}, Email words: {_word_count(out.email_body)}")
     
-    # Ensure email body has proper formatting with signature
-    def ensure_email_format(email_text: str) -> str:
-        """Ensure email has proper salutation, junior positions mention, and signature"""
-        email_text = email_text.strip()
-        
-        # Ensure it starts with proper salutation
-        if not email_text.startswith(('Dear', 'Dear Hiring Manager', 'Dear Recruiter')):
-            email_text = f"Dear Hiring Manager,\n\n{email_text}"
-        
-        # Ensure it includes the junior positions mention
-        junior_keywords = ['junior', 'other positions', 'consider my resume', 'other roles']
-        if not any(keyword in email_text.lower() for keyword in junior_keywords):
-            # Insert before the closing
-            if 'Best regards' in email_text:
-                parts = email_text.split('Best regards')
-                email_text = parts[0] + "\nPlease also consider my resume for any other junior software positions that may be available, as I am eager to contribute to your organization's success.\n\nBest regards" + parts[1]
-            else:
-                email_text += "\n\nPlease also consider my resume for any other junior software positions that may be available."
-        
-        # Ensure proper signature
-        signature = """<<REDACTED_NAME>>
-<<REDACTED_EMAIL>> | phone: <<REDACTED_PHONE>>
-<<REDACTED_LINKEDIN>>
-<<REDACTED_GITHUB>>"""
-        
-        if signature not in email_text:
-            # Remove any existing signature and add the correct one
-            email_text = re.sub(r'(Best regards|Sincerely|Regards),?\s*\n.*$', '', email_text, flags=re.MULTILINE | re.DOTALL)
-            email_text = email_text.rstrip() + f'\n\nBest regards,\n\n{signature}'
-            
-        return email_text
-
     # Apply email formatting if needed
     original_email = out.email_body
     out.email_body = ensure_email_format(out.email_body)
     if original_email != out.email_body:
         print("[DEBUG] Applied proper email structure with signature")
 
+    # Over-length drafts are pruned locally; the model is only asked again for drafts that are too short
+    METRICS.count("length_checks")
+    _trim_draft(out, jd_text)
+
     # Smart revision - only if seriously out of bounds
     cl_words = _word_count(out.cover_letter)
     email_words = _word_count(out.email_body)
     
-    needs_fix = (cl_words < 100 or cl_words > 400 or email_words < 100 or email_words > 400)
+    needs_fix = (cl_words < MIN_DRAFT_WORDS or cl_words > MAX_DRAFT_WORDS
+                 or email_words < MIN_DRAFT_WORDS or email_words > MAX_DRAFT_WORDS)
     
     if needs_fix:
+        METRICS.count("revision_calls")
         print(f"[REVISION] Cover letter: {cl_words} words, Email: {email_words} words")
         
         FIX_PROMPT = f"""Fix word counts while maintaining professional format:
@@ -414,7 +683,7 @@ Return JSON with 'cover_letter' and 'email_body'."""
         }
 
         try:
-            rev_resp = chat(
+            rev_resp = _chat(
                 model=model,
                 messages=[{"role": "user", "content": FIX_PROMPT}],
                 format=fix_schema,
@@ -434,15 +703,145 @@ Return JSON with 'cover_letter' and 'email_body'."""
             print(f"[REVISION FAILED] {e}")
 
     return out
-def extract_company_emails(company: str, company_url: str, 
-                          model: str = "llama3:8b-instruct-q6_K",
-                          temperature: float = 0.1) -> Optional[str]:
+
+# Prompt-token budget for the job part of one batched request (see pack_batches)
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "3000"))
+BATCH_TOKENS_PER_DRAFT = 900  # output budget per job in a batched request
+
+BATCH_JOB_TEMPLATE = """
+JOB {index}:
+CONTEXT: Applying for {title} at {company}
+
+JOB REQUIREMENTS:
+{jd_text}
+"""
+
+BATCH_INSTRUCTIONS = """
+Generate one application package per job above. Return VALID JSON {{"drafts": [...]}}
+with exactly {n} entries, each with "job_index" set to the JOB number and the fields above."""
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "drafts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "job_index": {"type": "integer"},
+                    "cover_letter": {"type": "string"},
+                    "email_body": {"type": "string"},
+                    "match_summary": {"type": "string"},
+                    "strengths": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["job_index", "cover_letter", "email_body", "match_summary", "strengths"],
+            },
+        }
+    },
+    "required": ["drafts"],
+}
+
+def pack_batches(jd_texts: List[str], max_jobs: int, token_budget: int = LLM_BATCH_TOKEN_BUDGET) -> List[List[int]]:
     """
-    Extract company email addresses using Ollama model for general inquiries, careers, HR, or recruiting purposes.
-    Automatically extracts domain from job URL for email construction.
-    Returns comma-separated string of emails or None if extraction fails.
+    Group consecutive jobs (keeping rank order) into batches of at most `max_jobs`
+    whose job descriptions fit `token_budget` prompt tokens. A job too large for
+    the budget gets a batch of its own.
+    """
+    batches, current, used = [], [], 0
+    for i, jd in enumerate(jd_texts):
+        cost = min(approx_tokens(jd), LLM_JD_TOKEN_BUDGET) + 40
+        if current and (len(current) >= max_jobs or used + cost > token_budget):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _split_batch(content: str, n: int) -> List[Optional[CoverLetterOut]]:
+    """Validated drafts by job position; None where an entry is missing, duplicated or invalid."""
+    results: List[Optional[CoverLetterOut]] = [None] * n
+    try:
+        drafts = json.loads(content).get("drafts", [])
+    except (ValueError, AttributeError):
+        return results
+    for item in drafts if isinstance(drafts, list) else []:
+        if not isinstance(item, dict):
+            continue
+        idx = item.pop("job_index", None)
+        if not isinstance(idx, int) or not 1 <= idx <= n or results[idx - 1] is not None:
+            continue
+        try:
+            results[idx - 1] = CoverLetterOut.model_validate(item)
+        except ValidationError:
+            continue
+    return results
+
+def generate_cover_letters_batch(jobs: List[tuple], resume_text: str,
+                                 model: str = "llama3:8b",
+                                 temperature: float = 0.3) -> List[CoverLetterOut]:
+    """
+    Batched generate_cover_letter_and_email_body: `jobs` is a list of
+    (company, title, jd_text) drafted with one structured-output request that
+    shares the resume/instructions prefix. Each returned draft is validated and
+    post-processed like a single one; entries that are missing, invalid or
+    outside MIN_DRAFT_WORDS..MAX_DRAFT_WORDS after trimming are regenerated
+    individually. Results are in `jobs` order.
     """
-    # Extract domain from URL
+    if len(jobs) == 1:
+        return [generate_cover_letter_and_email_body(*jobs[0], resume_text, model=model, temperature=temperature)]
+
+    body = "".join(
+        BATCH_JOB_TEMPLATE.format(index=i, company=company.strip(), title=title.strip(),
+                                  jd_text=condense_jd(jd_text, resume_text))
+        for i, (company, title, jd_text) in enumerate(jobs, 1)
+    )
+    stable = combined_prefix(resume_text)
+    messages = [
+        {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+        {"role": "user", "content": stable + body + BATCH_INSTRUCTIONS.format(n=len(jobs))},
+    ]
+    # the window is fixed; output gets what the prompt leaves (items cut short are retried below)
+    num_predict = min(BATCH_TOKENS_PER_DRAFT * len(jobs),
+                      LLM_NUM_CTX - approx_tokens(stable + body) - 256)
+    options = {
+        "temperature": temperature,
+        "num_predict": max(num_predict, BATCH_TOKENS_PER_DRAFT),
+        "num_ctx": LLM_NUM_CTX,
+        "top_k": 40,
+        "top_p": 0.9,
+        "repeat_penalty": 1.1,
+        "num_thread": 14,
+        "num_gpu": 1,
+    }
+    METRICS.count("batch_calls")
+    METRICS.count("batch_items", len(jobs))
+    try:
+        resp = _chat(model=model, messages=messages, format=BATCH_SCHEMA, stream=False, options=options)
+        results = _split_batch(resp.message.content, len(jobs))
+    except Exception as e:
+        print(f"[BATCH] Request failed: {e}")
+        results = [None] * len(jobs)
+
+    for i, ((company, title, jd_text), out) in enumerate(zip(jobs, results)):
+        if out is not None:
+            out.email_body = ensure_email_format(out.email_body)
+            _trim_draft(out, jd_text)
+            words = (_word_count(out.cover_letter), _word_count(out.email_body))
+            if min(words) >= MIN_DRAFT_WORDS and max(words) <= MAX_DRAFT_WORDS:
+                METRICS.count("drafts")
+                METRICS.count("length_checks")
+                continue
+        METRICS.count("batch_item_retries")
+        print(f"[BATCH] Job {i + 1}/{len(jobs)} ({company}) invalid or out of length range in batch; "
+              f"drafting individually")
+        results[i] = generate_cover_letter_and_email_body(company, title, jd_text, resume_text,
+                                                          model=model, temperature=temperature)
+    return results
+
+def extract_domain(company_url: str) -> Optional[str]:
+    """Return the base domain of a company URL (e.g. https://www.wise.com/jobs -> wise.com)."""
     try:
         parsed_url = urlparse(company_url)
         domain = parsed_url.netloc
@@ -454,15 +853,24 @@ def extract_company_emails(company: str, company_url: str,
         # Extract the main domain name (e.g., wise.com from wise.com)
         domain_parts = domain.split('.')
         if len(domain_parts) >= 2:
-            company_domain = f"{domain_parts[-2]}.{domain_parts[-1]}"
-        else:
-            company_domain = domain
+            return f"{domain_parts[-2]}.{domain_parts[-1]}"
+        return domain or None
         
     except Exception as e:
         print(f"Error parsing URL {company_url}: {e}")
         return None
-    # Pause for 5 seconds before the Ollama call
-    time.sleep(10)
+
+def extract_company_emails(company: str, company_url: str, 
+                          model: str = "llama3:8b-instruct-q6_K",
+                          temperature: float = 0.1) -> Optional[str]:
+    """
+    Extract company email addresses using Ollama model for general inquiries, careers, HR, or recruiting purposes.
+    Automatically extracts domain from job URL for email construction.
+    Returns comma-separated string of emails or None if extraction fails.
+    """
+    company_domain = extract_domain(company_url)
+    if not company_domain:
+        return None
     # Construct the prompt
     prompt = f"""
                 Find all general email addresses publicly associated with the company {company} (website: {company_domain}). The output should be a list of comma-separated email addresses in the following style:
@@ -483,8 +891,8 @@ def extract_company_emails(company: str, company_url: str,
                 """
     try:
         
-        # Make the call to Ollama
-        response = chat(
+        # Make the call to Ollama (paced by the shared LLM_LIMITER, see llm.throttle)
+        response = _chat(
             model=model,
             messages=[
                 {"role": "system", "content": "You are an expert at extracting and formatting company contact information. Return only the requested data with no additional commentary."},
@@ -499,9 +907,7 @@ def extract_company_emails(company: str, company_url: str,
                 "num_ctx": 4096, 
             },
         )
-        
-        # Pause for 2 seconds after the Ollama call
-        time.sleep(14)
+
         # Extract and clean the response
         email_list = response.message.content.strip()
         
@@ -524,8 +930,6 @@ def extract_company_emails(company: str, company_url: str,
             
     except Exception as e:
         print(f"Error extracting emails for {company}: {e}")
-        # Pause for 2 seconds after the Ollama call
-        time.sleep(10)
         return None
     
 
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LLM_RPS = float(os.getenv("LLM_RPS", "2"))                   # request starts per second (0 = unlimited)
+LLM_BURST = int(os.getenv("LLM_BURST", "2"))                 # starts allowed back-to-back after idle time
+# Requests in flight are capped by the backend (LLM_BACKEND_CONCURRENCY, see llm.backends), not here.
+
+_waits = threading.local()
+
+
+def record_wait(seconds: float):
+    """Note time this thread spent queued by our own limits (rate, backend slots), not on the LLM."""
+    _waits.total = getattr(_waits, "total", 0.0) + seconds
+
+
+def waited() -> float:
+    """Total queued time recorded on this thread so far."""
+    return getattr(_waits, "total", 0.0)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for LLM requests.
+
+    Starts at one request in flight and adds a slot after `limit` consecutive
+    healthy calls, up to `max_limit`. An error, or a call much slower than the
+    running average, halves the limit and pauses new calls for `backoff` seconds.
+    Latency excludes time queued behind LLM_LIMITER or the backend's slots
+    (see record_wait), so self-imposed limits are not mistaken for a slow server.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, slow_factor: float = 2.0,
+                 backoff: float = 5.0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.slow_factor = slow_factor
+        self.backoff = backoff
+        self.limit = self.min_limit
+        self.in_flight = 0
+        self.avg_latency = None
+        self._streak = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < self.limit:
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+
+        t0 = time.monotonic()
+        queued0 = waited()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(time.monotonic() - t0 - (waited() - queued0), ok)
+
+    def _record(self, latency: float, ok: bool):
+        with self._cond:
+            self.in_flight -= 1
+            slow = self.avg_latency is not None and latency > self.slow_factor * self.avg_latency
+            if not ok or slow:
+                self.limit = max(self.min_limit, self.limit // 2)
+                self._streak = 0
+                self._paused_until = time.monotonic() + self.backoff
+            else:
+                self._streak += 1
+                if self._streak >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._streak = 0
+            if ok:
+                self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            self._cond.notify_all()
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            record_wait(wait)
+
+
+# Paces the start of every LLM request in the process
+LLM_LIMITER = TokenBucket(LLM_RPS, LLM_BURST)
@@ -0,0 +1,89 @@
+import datetime as dt
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from ..db.models import Job
+from . import rank
+from .skills import CATALOG, SKILL_BITS
+
+DAY = np.timedelta64(1, "D")
+
+
+@dataclass
+class JobMatrix:
+    """Column arrays of the persisted job index, one entry per job."""
+    ids: np.ndarray           # int64
+    skills_mask: np.ndarray   # int64 bitmask, bit i = i-th CATALOG skill
+    is_junior: np.ndarray     # bool
+    is_senior: np.ndarray     # bool
+    is_remote: np.ndarray     # bool
+    posted_at: np.ndarray     # datetime64[us], NaT when unknown
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "JobMatrix":
+        """rows of (id, skills_mask, is_junior_title, is_senior_title, is_remote, posted_at)."""
+        rows = list(rows)
+        cols = list(zip(*rows)) if rows else [()] * 6
+        return cls(
+            ids=np.array(cols[0], dtype=np.int64),
+            skills_mask=np.array([m or 0 for m in cols[1]], dtype=np.int64),
+            is_junior=np.array([bool(v) for v in cols[2]], dtype=bool),
+            is_senior=np.array([bool(v) for v in cols[3]], dtype=bool),
+            is_remote=np.array([bool(v) for v in cols[4]], dtype=bool),
+            posted_at=np.array(cols[5], dtype="datetime64[us]"),
+        )
+
+
+def load_job_matrix(session, unapplied_only: bool = False) -> JobMatrix:
+    """Load only the index columns (never jd_text/raw_json), refreshing stale index rows first."""
+    rank.refresh_skill_index(session)
+    q = select(Job.id, Job.skills_mask, Job.is_junior_title, Job.is_senior_title,
+               Job.is_remote, Job.posted_at).order_by(Job.id)
+    if unapplied_only:
+        q = q.where(Job.applied_at.is_(None))
+    return JobMatrix.from_rows(session.execute(q))
+
+
+def score_matrix(resume_skills: Dict[str, float], m: JobMatrix, now: Optional[dt.datetime] = None) -> np.ndarray:
+    """
+    Vectorized rank.score_job over every job. Terms are added in the same order
+    as score_job, so each score is bit-for-bit the float score_job returns.
+    """
+    now = np.datetime64(now or rank.NOW, "us")
+    scores = np.zeros(len(m), dtype=np.float64)
+    for canonical, bit in SKILL_BITS.items():
+        if canonical in resume_skills:
+            scores += np.where(m.skills_mask & bit, CATALOG[canonical].weight, 0.0)
+
+    scores += np.where(m.is_junior, 3.0, 0.0)
+    scores += np.where(m.is_remote, 1.5, 0.0)
+    scores += np.where(m.is_senior, -4.0, 0.0)
+
+    known = ~np.isnat(m.posted_at)
+    days = np.zeros(len(m), dtype=np.int64)
+    days[known] = (now - m.posted_at[known]) // DAY
+    days = np.maximum(days, 0)
+    recency = np.maximum(0.0, (90 - days) / 90.0) * 3.0
+    scores += np.where(known, recency, 0.0)
+    return scores
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row positions of the k best scores, best first. Ties keep table order, matching
+    a stable sort of all rows, but only the candidates from argpartition are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    candidates = np.flatnonzero(scores >= threshold)
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
@@ -1,24 +1,19 @@
 import argparse
 import datetime as dt
 import json
-from typing import Dict, List, Tuple
+import operator
+from functools import reduce
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, literal, select
+from sqlalchemy.orm import undefer
 
 from ..db.db import SessionLocal
 from ..db.models import Job, Company
-from .skills import CATALOG, JR_POS_RX, SENIOR_NEG_RX, REMOTE_RX
+from .skills import CATALOG, CATALOG_VERSION, SKILL_BITS, job_index, mask_to_skills, skills_to_mask
 
 NOW = dt.datetime.utcnow()
 
-def _find_skills_in_text(text: str) -> Dict[str, float]:
-    # same logic as parse_resume, but inlined to avoid a circular import
-    found = {}
-    for canonical, sdef in CATALOG.items():
-        for pat in sdef.patterns:
-            if pat.search(text or ""):
-                found[canonical] = sdef.weight
-                break
-    return found
-
 def _recency_bonus(posted_at) -> float:
     """0..3 bonus. 3 if posted today, decays to ~0 by 90 days."""
     if not posted_at:
@@ -26,25 +21,41 @@ def _recency_bonus(posted_at) -> float:
     days = max(0, (NOW - posted_at).days)
     return max(0.0, (90 - days) / 90.0) * 3.0
 
-def score_job(resume_skills: Dict[str, float], job: Job) -> Tuple[float, Dict]:
-    jd = job.jd_text or ""
-    title = job.title or ""
-    loc = (job.location or "") + "\n" + jd
+def index_job(job: Job) -> bool:
+    """Fill the job's persisted skill index if missing or built from an older CATALOG. Returns True if updated."""
+    if job.skills_version == CATALOG_VERSION:
+        return False
+    for col, value in job_index(job.title, job.location, job.jd_text).items():
+        setattr(job, col, value)
+    return True
+
+def refresh_skill_index(session, batch_size: int = 500) -> int:
+    """Index every job whose index is missing or stale, committing per batch. Returns jobs indexed."""
+    stale = (Job.skills_version.is_(None)) | (Job.skills_version != CATALOG_VERSION)
+    ids = list(session.scalars(select(Job.id).where(stale)))
+    for start in range(0, len(ids), batch_size):
+        batch = select(Job).where(Job.id.in_(ids[start:start + batch_size])).options(undefer(Job.jd_text))
+        for job in session.scalars(batch):
+            index_job(job)
+        session.commit()
+    return len(ids)
 
-    job_skills = _find_skills_in_text(jd)
-    overlap = set(resume_skills).intersection(job_skills)
+def score_job(resume_skills: Dict[str, float], job: Job) -> Tuple[float, Dict]:
+    # Skills and flags come from the persisted index; the JD is only scanned if it is stale
+    index_job(job)
+    overlap = mask_to_skills(skills_to_mask(resume_skills) & (job.skills_mask or 0))
 
     skill_score = sum(CATALOG[k].weight for k in overlap)
 
-    title_boost = 3.0 if JR_POS_RX.search(title) else 0.0
-    senior_penalty = -4.0 if SENIOR_NEG_RX.search(title) else 0.0
-    remote_boost = 1.5 if REMOTE_RX.search(loc) else 0.0
+    title_boost = 3.0 if job.is_junior_title else 0.0
+    senior_penalty = -4.0 if job.is_senior_title else 0.0
+    remote_boost = 1.5 if job.is_remote else 0.0
     recency = _recency_bonus(job.posted_at)
 
     total = skill_score + title_boost + remote_boost + senior_penalty + recency
 
     detail = {
-        "overlap": sorted(list(overlap), key=lambda k: CATALOG[k].weight, reverse=True),
+        "overlap": sorted(overlap, key=lambda k: CATALOG[k].weight, reverse=True),
         "skill_score": round(skill_score, 2),
         "title_boost": title_boost,
         "remote_boost": remote_boost,
@@ -54,11 +65,44 @@ def score_job(resume_skills: Dict[str, float], job: Job) -> Tuple[float, Dict]:
     }
     return total, detail
 
+def score_sql(resume_skills: Dict[str, float], now: Optional[dt.datetime] = None):
+    """
+    score_job as a SQL expression over the persisted index columns, for ORDER BY in the database.
+    Recency is a CASE over day boundaries so it is exact and portable (no date arithmetic in SQL).
+    """
+    now = now or NOW
+    terms = [
+        case((Job.skills_mask.op("&")(bit) != 0, CATALOG[k].weight), else_=0.0)
+        for k, bit in SKILL_BITS.items() if k in resume_skills
+    ]
+    terms += [
+        case((Job.is_junior_title.is_(True), 3.0), else_=0.0),
+        case((Job.is_remote.is_(True), 1.5), else_=0.0),
+        case((Job.is_senior_title.is_(True), -4.0), else_=0.0),
+        case(*[(Job.posted_at > now - dt.timedelta(days=d + 1), (90 - d) / 90.0 * 3.0) for d in range(90)],
+             else_=0.0),
+    ]
+    return reduce(operator.add, terms, literal(0.0)).label("score")
+
+def ranked_jobs_query(session, resume_skills: Dict[str, float], unapplied_only: bool = False):
+    """(Job, Company, score) best first. jd_text/raw_json stay deferred (see models.Job) until a job is used."""
+    score = score_sql(resume_skills)
+    q = (
+        session.query(Job, Company, score)
+        .join(Company, Company.id == Job.company_id)
+        .order_by(score.desc(), Job.id)
+    )
+    if unapplied_only:
+        q = q.filter(Job.applied_at.is_(None))
+    return q
+
 def main():
     ap = argparse.ArgumentParser(description="Rank jobs against your resume skills.")
     ap.add_argument("--top", type=int, default=20, help="How many to display")
     ap.add_argument("--dump-csv", type=str, default="", help="Optional: path to export CSV")
     ap.add_argument("--resume-profile", type=str, default="data/resume_profile.json")
+    ap.add_argument("--reindex", action="store_true",
+                    help="Rebuild the stored skill index for stale jobs before ranking")
     args = ap.parse_args()
 
     # Load resume profile
@@ -67,16 +111,33 @@ def main():
     resume_skills = {k: float(v) for k, v in profile.get("skills", {}).items()}
 
     s = SessionLocal()
-    rows = (
-        s.query(Job, Company)
-        .join(Company, Company.id == Job.company_id)
-        .all()
-    )
+    if args.reindex:
+        print(f"[index] Indexed {refresh_skill_index(s)} jobs (catalog {CATALOG_VERSION})")
+    # Score every job from the index columns in one vectorized pass, then load only the rows shown
+    from .batch import load_job_matrix, score_matrix, top_k
+    matrix = load_job_matrix(s)
+    scores = score_matrix(resume_skills, matrix)
+    order = top_k(scores, len(matrix) if args.dump_csv else args.top)
+    ids = [int(i) for i in matrix.ids[order]]
+
+    by_id = {}
+    for start in range(0, len(ids), 1000):
+        rows = (
+            s.query(Job, Company)
+            .join(Company, Company.id == Job.company_id)
+            .filter(Job.id.in_(ids[start:start + 1000]))
+            .all()
+        )
+        by_id.update({job.id: (job, comp) for job, comp in rows})
+
     scored = []
-    for job, comp in rows:
-        score, detail = score_job(resume_skills, job)
+    for pos, job_id in zip(order, ids):
+        if job_id not in by_id:
+            continue
+        job, comp = by_id[job_id]
+        _, detail = score_job(resume_skills, job)
         scored.append({
-            "score": round(score, 2),
+            "score": round(float(scores[pos]), 2),
             "company": comp.name,
             "title": job.title,
             "location": job.location,
@@ -87,7 +148,6 @@ def main():
         })
     s.close()
 
-    scored.sort(key=lambda r: r["score"], reverse=True)
     topn = scored[: args.top]
 
     # Pretty print table
@@ -1,6 +1,7 @@
 import re
+import hashlib
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Iterable, List, Dict
 
 @dataclass(frozen=True)
 class SkillDef:
@@ -49,3 +50,96 @@ CATALOG: Dict[str, SkillDef] = {
 JR_POS_RX = re.compile(r"\b(intern|new grad|junior|entry|graduate)\b", re.I)
 SENIOR_NEG_RX = re.compile(r"\b(senior|sr\.?|staff|principal|lead)\b", re.I)
 REMOTE_RX = re.compile(r"\bremote\b", re.I)
+
+# Bit i of a job's skills_mask is the i-th CATALOG skill (BigInteger column, so at most 63 skills)
+SKILL_BITS: Dict[str, int] = {canonical: 1 << i for i, canonical in enumerate(CATALOG)}
+assert len(SKILL_BITS) <= 63, "skills_mask is a signed 64-bit column"
+
+def _index_version() -> str:
+    """Hash of everything the persisted job index depends on; any edit invalidates stored rows."""
+    h = hashlib.sha1()
+    for canonical, sdef in CATALOG.items():
+        h.update(canonical.encode())
+        for pat in sdef.patterns:
+            h.update(pat.pattern.encode())
+    for rx in (JR_POS_RX, SENIOR_NEG_RX, REMOTE_RX):
+        h.update(rx.pattern.encode())
+    return h.hexdigest()[:16]
+
+CATALOG_VERSION = _index_version()
+
+def skills_to_mask(skills: Iterable[str]) -> int:
+    mask = 0
+    for k in skills:
+        mask |= SKILL_BITS.get(k, 0)
+    return mask
+
+def mask_to_skills(mask: int) -> List[str]:
+    """Canonical skills set in `mask`, in CATALOG order."""
+    return [k for k, bit in SKILL_BITS.items() if mask & bit]
+
+def _first_char(pattern: str):
+    """Lower-cased literal a pattern must start with (after a leading \\b), or None if unknown."""
+    p = pattern[2:] if pattern.startswith(r"\b") else pattern
+    if p[:1].isalnum():
+        return p[0].casefold()
+    if p[:1] == "\\" and p[1:2] and not p[1].isalnum():
+        return p[1]
+    return None
+
+class SkillMatcher:
+    """
+    Finds every CATALOG skill in one scan of the text.
+
+    All patterns are folded into a single zero-width alternation, so the text is
+    walked once and only the positions where some pattern starts are reported.
+    At those positions each candidate pattern (same first character) is confirmed
+    with its own compiled regex, which keeps results identical to searching
+    every pattern separately, even where two patterns start at the same spot.
+    """
+
+    def __init__(self, catalog: Dict[str, SkillDef]):
+        self.catalog = catalog
+        self._by_first: Dict[str, List] = {}
+        self._anywhere: List = []
+        branches = []
+        for canonical, sdef in catalog.items():
+            for pat in sdef.patterns:
+                branches.append(f"(?:{pat.pattern})")
+                first = _first_char(pat.pattern)
+                bucket = self._anywhere if first is None else self._by_first.setdefault(first, [])
+                bucket.append((canonical, pat))
+        lead = ""
+        if not self._anywhere:
+            # cheap first-character gate so most positions are rejected before any branch is tried
+            lead = "(?=[" + "".join(re.escape(c) for c in sorted(self._by_first)) + "])"
+        self._rx = re.compile(lead + "(?=" + "|".join(branches) + ")", re.I)
+
+    def find(self, text: str) -> Dict[str, float]:
+        """canonical skill -> weight, in CATALOG order."""
+        text = text or ""
+        found = set()
+        for m in self._rx.finditer(text):
+            p = m.start()
+            for canonical, pat in self._by_first.get(text[p].casefold(), []) + self._anywhere:
+                if canonical not in found and pat.match(text, p):
+                    found.add(canonical)
+            if len(found) == len(self.catalog):
+                break
+        return {k: sdef.weight for k, sdef in self.catalog.items() if k in found}
+
+MATCHER = SkillMatcher(CATALOG)
+
+def find_skills(text: str) -> Dict[str, float]:
+    return MATCHER.find(text)
+
+def job_index(title: str, location: str, jd_text: str) -> dict:
+    """Values for the persisted per-job index columns (skills bitmask + title/remote flags)."""
+    jd_text = jd_text or ""
+    return {
+        "skills_mask": skills_to_mask(MATCHER.find(jd_text)),
+        "is_junior_title": bool(JR_POS_RX.search(title or "")),
+        "is_senior_title": bool(SENIOR_NEG_RX.search(title or "")),
+        "is_remote": bool(REMOTE_RX.search((location or "") + "\n" + jd_text)),
+        "skills_version": CATALOG_VERSION,
+    }
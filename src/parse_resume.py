@@ -5,7 +5,7 @@ from typing import Set, Dict
 from unidecode import unidecode
 import fitz  # PyMuPDF
 
-from .match.skills import CATALOG, SkillDef
+from .match.skills import MATCHER
 
 @dataclass
 class ResumeProfile:
@@ -22,15 +22,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     return unidecode(text)
 
 def find_skills(text: str) -> Dict[str, float]:
-    found = {}
-   # print(CATALOG.items())
-    for canonical, sdef in CATALOG.items():
-        assert isinstance(sdef, SkillDef)
-        for pat in sdef.patterns:
-            if pat.search(text):
-                found[canonical] = sdef.weight
-                break
-    return found
+    return MATCHER.find(text)
 
 def build_profile(pdf_path: str) -> ResumeProfile:
     text = extract_text_from_pdf(pdf_path)
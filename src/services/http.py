@@ -0,0 +1,33 @@
+"""
+Pooled HTTP sessions shared by everything that talks to a remote API over requests
+(the ATS board fetcher, the OpenAI-compatible LLM backend).
+"""
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ThreadLocalSessions:
+    """
+    One keep-alive requests.Session per thread (requests.Session is not thread-safe),
+    each mounted with an HTTPAdapter of `pool_maxsize` connections per host.
+    """
+
+    def __init__(self, pool_maxsize: int, pool_connections: int = 1, headers: Optional[Dict[str, str]] = None):
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.pool_connections = max(1, pool_connections)
+        self.headers = dict(headers or {})
+        self._local = threading.local()
+
+    def get(self) -> requests.Session:
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+            http.mount("http://", adapter)
+            http.mount("https://", adapter)
+            http.headers.update(self.headers)
+            self._local.http = http
+        return http
@@ -5,6 +5,8 @@ import glob
 import time 
 from dotenv import load_dotenv
 from ..db.db import SessionLocal
+from ..db.contacts import emails_by_job, split_emails
+from ..db.rollup import record_application
 from src.db.models import Job, Company, JobsApplied
 from src.submit.k_submit import submit_via_email_and_send_push_notification, parse_draft_parts, submit_via_greenhouse, submit_via_form, k_send_email, k_send_email_text
 from datetime import datetime
@@ -30,6 +32,7 @@ load_dotenv()
 def main(resume_pdf, draft_dir, smtp_user, smtp_pass, smtp_host, smtp_port):
     session = SessionLocal() 
     jobs = session.query(Job).filter(Job.applied_at == None).all()
+    contacts = emails_by_job(session, [job.id for job in jobs])
     smtp_cfg = {"user": smtp_user, "password": smtp_pass, "host": smtp_host, "port": smtp_port}
     i = 0
     alljobs = ""
@@ -68,9 +71,12 @@ def main(resume_pdf, draft_dir, smtp_user, smtp_pass, smtp_host, smtp_port):
         
         ### SEND EMAIL#################
         is_email_sent = False
+        # without job_contacts (migration 0004 not run, or no rows for the job) use the capped column
+        to_emails = contacts.get(job.id) or split_emails(job.contact_email)
         try:
-            if not is_file_missing and job.contact_email:
-                submit_via_email_and_send_push_notification(job, path, sender_email=smtp_user, smtp_config=smtp_cfg)
+            if not is_file_missing and to_emails:
+                submit_via_email_and_send_push_notification(job, path, sender_email=smtp_user, smtp_config=smtp_cfg,
+                                                            to_emails=to_emails)
                 is_email_sent=True
                 # Add 5-second delay
                 time.sleep(5)       
@@ -92,18 +98,22 @@ def main(resume_pdf, draft_dir, smtp_user, smtp_pass, smtp_host, smtp_port):
         # Mark as applied
         if not is_file_missing and is_email_sent:
             from datetime import datetime, UTC
-            job.applied_at = datetime.now(UTC)
+            # naive UTC, the same value on both rows, so daily_stats and its rebuild agree on the day
+            applied_at = datetime.now(UTC).replace(tzinfo=None)
+            job.applied_at = applied_at
             # Insert into jobs_applied table
             applied_job = JobsApplied(
                 job_id=job.id,
                 job_name=job.title,
                 company_name=job.company.name,
+                applied_at=applied_at,
                 response_received=False,  # Default to False
                 #cover_letter_sent="Email Sent to:" + job.contact_email + " Path: " + path #draft_md[:550]  # Store first 550 characters
-                cover_letter_sent = f"Email Sent to: {job.contact_email or 'N/A'} Path: {path}"
+                cover_letter_sent = f"Email Sent to: {', '.join(to_emails) or 'N/A'} Path: {path}"
             )
 
             session.add(applied_job)
+            record_application(session, job.id, to_emails, day=applied_at.date())  # daily_stats, committed with the row
             session.commit()
             session.refresh(applied_job) 
 
@@ -136,10 +136,12 @@ def parse_draft_parts(draft_path) -> dict:
     }
 
 
-def submit_via_email_and_send_push_notification(job, draft_md_path, sender_email, smtp_config):
+def submit_via_email_and_send_push_notification(job, draft_md_path, sender_email, smtp_config, to_emails=None):
     """
     Send the parsed draft cover letter as an email.
+    to_emails: recipient list (job_contacts); defaults to the job's comma-separated contact_email.
     """
+    to_emails = to_emails or job.contact_email
     print("submit_via_email")
     draft_data = parse_draft_parts(Path(draft_md_path))
     email_body = draft_data["email_body"]
@@ -149,7 +151,7 @@ def submit_via_email_and_send_push_notification(job, draft_md_path, sender_email
     k_send_email(
         email_subject=f"Application for {job.title}",
         email_body=email_body,
-        to_emails=job.contact_email,
+        to_emails=to_emails,
         sender_email=sender_email,
         smtp_config=smtp_config,
         pdf_path="./data/resumes/resume-latest.pdf"
@@ -158,7 +160,8 @@ def submit_via_email_and_send_push_notification(job, draft_md_path, sender_email
     # PUSH NOTIFICATION
     user_key = os.getenv("PUSHOVER_USER")
     api_token = os.getenv("PUSHOVER_API_TOKEN")
-    push_msg = f"EMAIL SENT TO:\n {job.contact_email} \n\nJOB TITLE:\n {job.title} \n\nEMAIL DETAILS:\n {email_body}"
+    recipients = to_emails if isinstance(to_emails, str) else ", ".join(to_emails)
+    push_msg = f"EMAIL SENT TO:\n {recipients} \n\nJOB TITLE:\n {job.title} \n\nEMAIL DETAILS:\n {email_body}"
     push(push_msg, f"Applied for Job #{job.id} : {job.title}", user_key, api_token)
     #user_key2 = os.getenv("PUSHOVER_USER_3")
     #api_token2 = os.getenv("PUSHOVER_API_TOKEN_3")
@@ -184,14 +187,18 @@ def k_send_email_text(email_subject, email_body, to_emails, sender_email, smtp_c
 
 
 def k_send_email(email_subject, email_body, to_emails, sender_email, smtp_config, pdf_path=None):
-    TO_emails = [email.strip() for email in to_emails.split(",")]
+    # to_emails: a list of addresses, or a comma-separated string of them
+    if isinstance(to_emails, str):
+        to_emails = to_emails.split(",")
+    TO_emails = [email.strip() for email in to_emails if email.strip()]
+    to_header = ", ".join(TO_emails)
     EMAIL_CC = os.getenv("EMAIL_CC", "")
     if EMAIL_CC:
         TO_emails.append(EMAIL_CC)  
     msg = MIMEMultipart()
     msg["Subject"] = email_subject
     msg["From"] = sender_email
-    msg["To"] = to_emails
+    msg["To"] = to_header
    # msg["cc"] = os.getenv("EMAIL_CC", "")
     msg.attach(MIMEText(email_body, "plain"))
     
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the pipeline as `src.*`, the same way it is run from the repository root
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """An empty SQLite database, migrated to the current schema, that get_engine()/SessionLocal use."""
+    from src.config import settings
+    from src.db import db
+
+    monkeypatch.setattr(settings, "DB_URL", f"sqlite:///{tmp_path / 'pipeline.db'}")
+    monkeypatch.setattr(db, "_engine", None)
+    engine = db.get_engine()
+    yield engine
+    engine.dispose()
@@ -0,0 +1,45 @@
+"""
+MeteredQueuePool: sizing comes from the values engine_options passes, and exhaustion is reported.
+"""
+import pytest
+from sqlalchemy import create_engine, exc
+
+from src.db import db
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=db.MeteredQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.2)
+    yield engine
+    engine.dispose()
+
+
+def test_pool_keeps_the_configured_limits(engine):
+    assert (engine.pool.overflow_limit, engine.pool.checkout_timeout) == (1, 0.2)
+    recreated = engine.pool.recreate()
+    assert (recreated.overflow_limit, recreated.checkout_timeout) == (1, 0.2)
+
+
+def test_exhausted_pool_warns_and_counts_the_timeout(engine, capsys):
+    timeouts = db.POOL_METRICS.timeouts
+    held = [engine.connect(), engine.connect()]  # pool_size + max_overflow
+    try:
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    finally:
+        for conn in held:
+            conn.close()
+    out = capsys.readouterr().out
+    assert "Connection pool exhausted (2 in use); waiting up to 0s" in out
+    assert "Timed out after 0s" in out
+    assert db.POOL_METRICS.timeouts == timeouts + 1
+
+
+def test_engine_options_size_the_metered_pool(monkeypatch):
+    monkeypatch.setattr(db.settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(db.settings, "DB_MAX_OVERFLOW", 7)
+    monkeypatch.setattr(db.settings, "DB_POOL_TIMEOUT", 4.0)
+    options = db.engine_options("postgresql+psycopg2://u:p@localhost/jobs")
+    assert options["poolclass"] is db.MeteredQueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"]) == (3, 7, 4.0)
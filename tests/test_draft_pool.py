@@ -0,0 +1,159 @@
+"""
+draft_letter's worker pool (--workers > 1) against the in-process FakeBackend.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from src.compose import draft_letter
+from src.db.models import Company, Job
+from src.llm import cache as llm_cache
+from src.llm import ollama_client
+from src.llm.backends import FakeBackend, set_backend
+from src.llm.throttle import AdaptiveLimiter, TokenBucket
+
+JOBS = 12
+WORKERS = 3
+
+
+class RecordingLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter that remembers the most requests it ever let through at once."""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_in_flight = 0
+        RecordingLimiter.instances.append(self)
+
+    def _record(self, latency, ok):
+        with self._cond:
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        super()._record(latency, ok)
+
+
+class SlowFake(FakeBackend):
+    """FakeBackend whose replies take `delay` seconds; counts requests in flight at the server."""
+
+    def __init__(self, delay: float, **kwargs):
+        super().__init__(reply=self._draft, **kwargs)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _draft(self, model, messages, format):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        words = " ".join(["Python services on AWS."] * 40)  # 160 words: no trimming or revision
+        return json.dumps({
+            "cover_letter": f"Dear Hiring Manager, {words}",
+            "email_body": f"Dear Hiring Manager, {words} Please also consider my resume for other junior roles.",
+            "match_summary": "Strong Python fit.",
+            "strengths": ["Python", "AWS"],
+        })
+
+
+@pytest.fixture
+def jobs(fresh_db):
+    with fresh_db.begin() as conn:
+        conn.execute(insert(Company), [{"id": i, "name": f"Company {i}"} for i in range(1, JOBS + 1)])
+        conn.execute(insert(Job), [
+            {"id": i, "company_id": i, "title": f"Junior Engineer {i}", "jd_text": "Python and AWS",
+             "url": f"https://jobs.example/{i}", "source": "lever", "raw_json": {}}
+            for i in range(1, JOBS + 1)])
+    return list(range(1, JOBS + 1))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = SlowFake(delay=0.05, max_concurrency=WORKERS)
+    set_backend(fake)
+    monkeypatch.setattr(ollama_client, "LLM_LIMITER", TokenBucket(0))  # no start-rate pacing in tests
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)  # restored after --no-llm-cache
+    monkeypatch.setattr(draft_letter, "AdaptiveLimiter", RecordingLimiter)
+    monkeypatch.setattr(draft_letter, "_extract_resume_text", lambda path: "Python developer, AWS, SQL.")
+    RecordingLimiter.instances = []
+    yield fake
+    set_backend(None)
+
+
+def _run(monkeypatch, tmp_path, *extra):
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps({"skills": {"python": 3.0}}))
+    outdir = tmp_path / "drafts"
+    monkeypatch.setattr(sys, "argv", ["draft_letter", "--all-jobs", "--workers", str(WORKERS),
+                                      "--resume-profile", str(profile), "--outdir", str(outdir),
+                                      "--no-llm-cache", *extra])
+    draft_letter.main()
+    return outdir
+
+
+def test_pool_writes_one_draft_per_job(jobs, backend, monkeypatch, tmp_path):
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (replaced.append(dst), real_replace(src, dst)))
+
+    outdir = _run(monkeypatch, tmp_path)
+
+    files = sorted(os.listdir(outdir))
+    assert sorted(int(f.split("_", 1)[0]) for f in files) == jobs
+    assert len(backend.calls) == JOBS
+    # every draft was renamed into place from a temp file, and none are left behind
+    assert sorted(os.path.basename(p) for p in replaced) == files
+    assert not [f for f in files if f.startswith(".") or f.endswith(".tmp")]
+    for f in files:
+        text = (outdir / f).read_text()
+        job_id = f.split("_", 1)[0]
+        assert f'company: "Company {job_id}"' in text and "## EmailsTo" in text
+
+
+def test_pool_stays_within_limiter_and_backend_bounds(jobs, backend, monkeypatch, tmp_path):
+    _run(monkeypatch, tmp_path)
+
+    (limiter,) = RecordingLimiter.instances
+    assert limiter.max_limit == WORKERS
+    assert 1 < limiter.max_in_flight <= WORKERS
+    assert backend.max_in_flight <= WORKERS
+
+
+def test_existing_drafts_are_skipped(jobs, backend, monkeypatch, tmp_path):
+    _run(monkeypatch, tmp_path)
+    calls = len(backend.calls)
+
+    outdir = _run(monkeypatch, tmp_path)
+
+    assert len(os.listdir(outdir)) == JOBS and len(backend.calls) == calls
+
+
+@pytest.mark.parametrize("mode", [["--all-jobs"], ["--batch", "1/2"], ["--top-n", "5"]])
+def test_ranking_never_lazy_loads_jd_text(jobs, backend, monkeypatch, tmp_path, fresh_db, mode):
+    from sqlalchemy import event
+
+    # the jobs fixture leaves every skill index empty, as after a catalog change
+    lazy = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT jobs.jd_text") and "WHERE jobs.id = ?" in statement:
+            lazy.append(parameters)
+
+    event.listen(fresh_db, "before_cursor_execute", count)
+    try:
+        profile = tmp_path / "profile.json"
+        profile.write_text(json.dumps({"skills": {"python": 3.0}}))
+        monkeypatch.setattr(sys, "argv", ["draft_letter", *mode, "--workers", "1", "--resume-profile",
+                                          str(profile), "--outdir", str(tmp_path / "drafts"), "--no-llm-cache"])
+        draft_letter.main()
+    finally:
+        event.remove(fresh_db, "before_cursor_execute", count)
+    assert lazy == []
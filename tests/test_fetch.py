@@ -0,0 +1,153 @@
+"""
+BoardFetcher against a local stub of the Greenhouse/Lever APIs serving recorded board JSON.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.ingest import greenhouse, lever
+from src.ingest.fetch import BoardFetcher
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GREENHOUSE_BODY = (FIXTURES / "greenhouse_board.json").read_bytes()
+LEVER_BODY = (FIXTURES / "lever_board.json").read_bytes()
+GREENHOUSE_ETAG = '"gh-board-v1"'
+
+
+class StubBoards(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []  # (path, If-None-Match, status)
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        try:
+            time.sleep(srv.delay)
+            self._respond()
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+    def _respond(self):
+        srv = self.server
+        if_none_match = self.headers.get("If-None-Match")
+        if self.path.startswith("/v1/boards/missing/"):
+            status, body, headers = 404, b'{"status": 404, "error": "Job not found"}', {}
+        elif self.path.startswith("/v1/boards/"):
+            if if_none_match == GREENHOUSE_ETAG:
+                status, body, headers = 304, b"", {"ETag": GREENHOUSE_ETAG}
+            else:
+                status, body, headers = 200, GREENHOUSE_BODY, {"ETag": GREENHOUSE_ETAG}
+        elif self.path.startswith("/v0/postings/"):
+            # Lever sends no validators; unchanged boards are caught by the payload hash
+            status, body, headers = 200, LEVER_BODY, {}
+        else:
+            status, body, headers = 404, b"", {}
+        with srv.lock:
+            srv.requests.append((self.path, if_none_match, status))
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    srv = StubBoards()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(greenhouse, "API_BASE", srv.base)
+    monkeypatch.setattr(lever, "API_BASE", srv.base)
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _company(name, ats_type, slug=None):
+    return {"name": name, "ats_type": ats_type, "ats_slug": slug or name.lower()}
+
+
+def test_fetch_parses_recorded_boards(stub):
+    fetcher = BoardFetcher(max_workers=2, per_host=2, timeout=5)
+
+    gh = fetcher.fetch(_company("Acme", "greenhouse"))
+    assert [j["id"] for j in gh.postings] == [4012001, 4012002]
+    assert gh.etag == GREENHOUSE_ETAG
+    assert not gh.not_modified
+
+    lv = fetcher.fetch(_company("Globex", "lever"))
+    assert [j["text"] for j in lv.postings] == ["Software Engineer, New Grad"]
+    assert lv.etag is None and lv.content_hash
+
+
+def test_etag_revalidation_returns_not_modified(stub):
+    fetcher = BoardFetcher(max_workers=1, per_host=1, timeout=5)
+    first = fetcher.fetch(_company("Acme", "greenhouse"))
+
+    prev = {"etag": first.etag, "last_modified": first.last_modified, "content_hash": first.content_hash}
+    second = fetcher.fetch(_company("Acme", "greenhouse"), prev)
+
+    assert second.not_modified and second.postings == []
+    # the saved state carries over, so the next run revalidates with the same validators
+    assert (second.etag, second.content_hash) == (first.etag, first.content_hash)
+    assert [(inm, status) for _, inm, status in stub.requests] == [(None, 200), (GREENHOUSE_ETAG, 304)]
+
+
+def test_unchanged_payload_without_validators_is_not_modified(stub):
+    fetcher = BoardFetcher(max_workers=1, per_host=1, timeout=5)
+    first = fetcher.fetch(_company("Globex", "lever"))
+    second = fetcher.fetch(_company("Globex", "lever"), {"content_hash": first.content_hash})
+    assert second.not_modified and second.postings == []
+
+
+def test_fetch_all_reports_errors_per_board(stub):
+    fetcher = BoardFetcher(max_workers=4, per_host=4, timeout=5)
+    companies = [_company("Acme", "greenhouse"), _company("Gone", "greenhouse", "missing"),
+                 _company("Globex", "lever"), {"name": "NoAts", "ats_type": "workday", "ats_slug": "x"}]
+
+    results = {c["name"]: (page, err) for c, page, err in fetcher.fetch_all(companies)}
+
+    assert set(results) == {"Acme", "Gone", "Globex"}  # unsupported ATS skipped
+    page, err = results["Gone"]
+    assert err is not None and page.postings == [] and page.content_hash is None
+    assert results["Acme"][1] is None and len(results["Acme"][0].postings) == 2
+    assert results["Globex"][1] is None and len(results["Globex"][0].postings) == 1
+
+
+def test_fetch_all_caps_requests_per_host(stub):
+    stub.delay = 0.1
+    fetcher = BoardFetcher(max_workers=8, per_host=2, timeout=5)
+    companies = [_company(f"Co{i}", "greenhouse") for i in range(8)]
+
+    results = list(fetcher.fetch_all(companies))
+
+    assert len(results) == 8 and all(err is None for _, _, err in results)
+    # every board is on the one stub host: parallel, but never above the per-host cap
+    assert stub.max_in_flight == 2
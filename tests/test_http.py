@@ -0,0 +1,30 @@
+"""
+ThreadLocalSessions: the pooled sessions behind BoardFetcher and OpenAICompatBackend.
+"""
+import threading
+
+from src.ingest.fetch import BoardFetcher
+from src.llm.backends import OpenAICompatBackend
+from src.services.http import ThreadLocalSessions
+
+
+def test_one_session_per_thread():
+    sessions = ThreadLocalSessions(pool_maxsize=3)
+    mine = sessions.get()
+    other = []
+    t = threading.Thread(target=lambda: other.append(sessions.get()))
+    t.start()
+    t.join()
+    assert sessions.get() is mine and other[0] is not mine
+
+
+def test_pool_sizes_follow_the_callers_parallelism():
+    fetcher = BoardFetcher(max_workers=8, per_host=5)
+    adapter = fetcher._http().get_adapter("https://boards-api.greenhouse.io")
+    assert adapter._pool_maxsize == 5
+
+    backend = OpenAICompatBackend(base_url="http://localhost:8000/v1", api_key="k", max_concurrency=2)
+    http = backend._http()
+    assert http.get_adapter("http://localhost:8000")._pool_maxsize == 2
+    assert http.headers["Authorization"] == "Bearer k"
+    assert "Authorization" not in OpenAICompatBackend(api_key="")._http().headers
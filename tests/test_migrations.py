@@ -0,0 +1,132 @@
+"""
+Schema migrations against a database created by the first release (no tables or
+columns added since), the state an existing install is in when it upgrades.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db import db, migrations
+
+# companies / jobs / jobs_applied as the first release's create_all() made them
+LEGACY_DDL = [
+    """CREATE TABLE companies (
+        id INTEGER PRIMARY KEY, name VARCHAR(255) UNIQUE, website VARCHAR(512), ats_type VARCHAR(50),
+        ats_slug VARCHAR(255), domain VARCHAR(255), created_at DATETIME DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY, company_id INTEGER REFERENCES companies(id), title VARCHAR(255),
+        location VARCHAR(255), jd_text TEXT, url VARCHAR(1024) UNIQUE, posted_at DATETIME,
+        source VARCHAR(50), raw_json JSON, contact_email VARCHAR(255) NOT NULL, applied_at DATETIME)""",
+    """CREATE TABLE jobs_applied (
+        id INTEGER PRIMARY KEY, applied_at DATETIME DEFAULT CURRENT_TIMESTAMP, job_id INTEGER,
+        job_name VARCHAR(255), company_name VARCHAR(255), response_received BOOLEAN,
+        cover_letter_sent VARCHAR(550))""",
+]
+
+
+@pytest.fixture
+def legacy_url(tmp_path, monkeypatch):
+    """URL of a first-release SQLite database with one company and one job; get_engine() points at it."""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for ddl in LEGACY_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO companies (id, name, domain) VALUES (1, 'acme', 'acme.com')"))
+        conn.execute(text("INSERT INTO jobs (id, company_id, title, jd_text, url, source, raw_json, "
+                          "contact_email, posted_at) VALUES (1, 1, 'Junior Engineer', 'python', "
+                          "'https://jobs.example/1', 'lever', '{}', 'jobs@acme.com', '2024-05-01 10:00:00')"))
+    engine.dispose()
+    monkeypatch.setattr(settings, "DB_URL", url)
+    monkeypatch.setattr(db, "_engine", None)
+    yield url
+    if db._engine is not None:
+        db._engine.dispose()
+
+
+def test_first_connect_brings_legacy_database_current(legacy_url):
+    engine = db.get_engine()
+    with engine.connect() as conn:
+        done = migrations.applied_versions(conn)
+    assert done == {version for version, _ in migrations.MIGRATIONS}
+
+
+def test_domain_email_cache_exists_after_upgrade(legacy_url):
+    from src.ingest.enrich_emails import cached_emails
+
+    engine = db.get_engine()
+    assert inspect(engine).has_table("domain_emails")
+    with Session(engine) as s:
+        assert cached_emails(s, "acme.com") is None
+
+
+def test_board_fetch_state_exists_after_upgrade(legacy_url):
+    from src.db.models import Company
+    from src.ingest.fetch import BoardPage
+    from src.ingest.run_ingest import load_fetch_states, save_fetch_state
+
+    with Session(db.get_engine()) as s:
+        acme = s.get(Company, 1)
+        save_fetch_state(s, acme, BoardPage(etag='"v1"', content_hash="abc"), {"https://jobs.example/1": "h"})
+        s.commit()
+        state = load_fetch_states(s, {"acme": acme})["acme"]
+    assert state["etag"] == '"v1"' and state["posting_hashes"] == {"https://jobs.example/1": "h"}
+
+
+def test_job_index_columns_exist_after_upgrade(legacy_url):
+    from src.match.batch import load_job_matrix
+    from src.match.skills import CATALOG_VERSION, SKILL_BITS
+
+    engine = db.get_engine()
+    columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+    assert {"skills_mask", "skills_version", "is_junior_title", "is_senior_title", "is_remote"} <= columns
+    assert "ix_jobs_skills_version" in {ix["name"] for ix in inspect(engine).get_indexes("jobs")}
+    with Session(engine) as s:
+        m = load_job_matrix(s)  # indexes the legacy row, then reads the new columns
+        s.commit()
+        assert m.ids.tolist() == [1] and m.skills_mask.tolist() == [SKILL_BITS["python"]]
+        assert m.is_junior.tolist() == [True]
+        assert s.scalar(text("SELECT skills_version FROM jobs")) == CATALOG_VERSION
+
+
+def test_auto_migrate_can_be_turned_off(legacy_url, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", False)
+    engine = db.get_engine()
+    assert not inspect(engine).has_table("domain_emails")
+    assert "0002_job_index_columns" in capsys.readouterr().out
+    assert migrations.pending_versions(engine) == [version for version, _ in migrations.MIGRATIONS]
+
+
+def test_upgrade_is_idempotent(legacy_url):
+    engine = db.get_engine()
+    assert migrations.upgrade(engine) == []
+
+
+def test_posted_at_index_is_rebuilt_descending(legacy_url):
+    # as left by the first version of 0003, which built it ascending
+    engine = create_engine(legacy_url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_jobs_posted_at ON jobs (posted_at)"))
+    engine.dispose()
+
+    with db.get_engine().connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'ix_jobs_posted_at'")).scalar()
+        assert ddl.endswith("(posted_at DESC)")
+        assert migrations.check_indexes(conn.engine)
+
+
+def test_posted_at_index_on_postgres_matches_the_export_order():
+    from sqlalchemy import create_mock_engine
+
+    from src.db.models import Base
+
+    ddl = []
+    engine = create_mock_engine("postgresql+psycopg2://",
+                                lambda sql, *a, **kw: ddl.append(str(sql.compile(dialect=engine.dialect))))
+    Base.metadata.create_all(engine, checkfirst=False)
+    posted_at = [d for d in ddl if "ix_jobs_posted_at" in d]
+    assert posted_at == ["CREATE INDEX ix_jobs_posted_at ON jobs (posted_at DESC NULLS LAST)"]
+
+    (name, stmt, index), = [q for q in migrations.hot_queries() if q[2] == "ix_jobs_posted_at"]
+    assert "ORDER BY jobs.posted_at DESC NULLS LAST" in str(stmt.compile(dialect=engine.dialect))
@@ -0,0 +1,109 @@
+"""
+daily_stats: what ingest and submit count live must equal what rebuild recomputes.
+"""
+import datetime as dt
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.db import db, rollup
+from src.db.models import DailyStats, Job
+from src.ingest import greenhouse, lever, run_ingest
+from src.ingest.fetch import BoardPage
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class RecordedFetcher:
+    """Stands in for BoardFetcher, serving the recorded board fixtures."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def fetch_all(self, companies, states=None):
+        for c in companies:
+            source = greenhouse if c["ats_type"] == "greenhouse" else lever
+            payload = json.loads((FIXTURES / f"{c['ats_type']}_board.json").read_text())
+            yield c, BoardPage(postings=source.parse_board(payload), content_hash=c["name"]), None
+
+
+def _days(session):
+    rows = session.scalars(select(DailyStats).order_by(DailyStats.day))
+    return [(r.day, r.jobs_found, r.applications, r.recipients) for r in rows]
+
+
+@pytest.fixture
+def ingested(fresh_db, tmp_path, monkeypatch):
+    seed = tmp_path / "seed.yaml"
+    seed.write_text(yaml.safe_dump({"companies": [
+        {"name": "Acme", "website": "https://acme.example", "ats_type": "greenhouse", "ats_slug": "acme"},
+        {"name": "Globex", "website": "https://globex.example", "ats_type": "lever", "ats_slug": "globex"},
+    ]}))
+    monkeypatch.setattr(run_ingest, "BoardFetcher", RecordedFetcher)
+    run_ingest.run(seed_path=str(seed))
+    return fresh_db
+
+
+def test_jobs_found_survives_rebuild(ingested):
+    today = dt.datetime.utcnow().date()
+    with Session(ingested) as s:
+        # both junior postings were posted in 2024 but found today, and stay on today after rebuild
+        assert sorted(d.date() for d in s.scalars(select(Job.posted_at))) == [dt.date(2024, 5, 1)] * 2
+        live = _days(s)
+        assert live == [(today, 2, 0, 0)]
+        rollup.rebuild(s)
+        assert _days(s) == live
+
+
+def test_reingest_keeps_the_first_created_at(ingested, monkeypatch, tmp_path):
+    with Session(ingested) as s:
+        first = sorted(s.scalars(select(Job.created_at)))
+    run_ingest.run(seed_path=str(tmp_path / "seed.yaml"), full=True)
+    with Session(ingested) as s:
+        assert sorted(s.scalars(select(Job.created_at))) == first
+        assert rollup.totals(s)["jobs_found"] == 2
+
+
+def _apply(session, job, emails, applied_at):
+    from src.db.models import JobsApplied
+
+    job.applied_at = applied_at
+    session.add(JobsApplied(job_id=job.id, job_name=job.title, applied_at=applied_at))
+    session.flush()
+    return rollup.record_application(session, job.id, emails, day=applied_at.date())
+
+
+def test_application_recipients_survive_rebuild(ingested):
+    from src.db.models import JobContact
+
+    applied_at = dt.datetime(2025, 3, 2, 23, 30)
+    with Session(ingested) as s:
+        first, second = s.scalars(select(Job).order_by(Job.id)).all()
+        s.add(JobContact(job_id=first.id, email="jobs@acme.example", domain="acme.example", source="posting"))
+        assert _apply(s, first, ["jobs@acme.example", "careers@acme.example"], applied_at) == 2
+        assert _apply(s, second, ["careers@acme.example"], applied_at) == 0  # already emailed
+        sources = dict(s.execute(select(JobContact.email, JobContact.source).where(JobContact.job_id == first.id)).all())
+        # the fallback recipient is labelled as sent; the posting's own address keeps its label
+        assert sources == {"jobs@acme.example": "posting", "careers@acme.example": "sent"}
+        live = _days(s)
+        assert (dt.date(2025, 3, 2), 0, 2, 2) in live
+        rollup.rebuild(s)
+        assert _days(s) == live
+
+
+def test_application_before_daily_stats_exists_is_not_counted(ingested, monkeypatch, capsys):
+    from src.db.models import DailyStats, JobsApplied
+
+    DailyStats.__table__.drop(ingested)
+    monkeypatch.setattr(db, "_tables_ready", set())
+    monkeypatch.setattr(db, "_tables_warned", set())
+    with Session(ingested) as s:
+        job = s.scalars(select(Job)).first()
+        assert _apply(s, job, ["careers@acme.example"], dt.datetime(2026, 10, 16, 9)) == 0
+        s.commit()
+        assert s.query(JobsApplied).count() == 1  # the application itself is still stored
+    assert "daily_stats table missing" in capsys.readouterr().out
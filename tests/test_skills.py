@@ -0,0 +1,52 @@
+"""
+SkillMatcher (single pass) must find exactly what searching every CATALOG pattern separately finds.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from src.ingest import greenhouse, lever
+from src.ingest.normalize import normalize_posting
+from src.ingest.run_ingest import clean_html_text
+from src.match.skills import CATALOG, MATCHER, SkillMatcher
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def per_pattern(text):
+    """The matcher SkillMatcher replaced: one search per pattern per skill."""
+    found = {}
+    for canonical, sdef in CATALOG.items():
+        for pat in sdef.patterns:
+            if pat.search(text or ""):
+                found[canonical] = sdef.weight
+                break
+    return found
+
+
+def _seed_jds():
+    jds = json.loads((FIXTURES / "seed_jds.json").read_text())
+    for name, source in (("greenhouse", greenhouse), ("lever", lever)):
+        payload = json.loads((FIXTURES / f"{name}_board.json").read_text())
+        jds += [clean_html_text(normalize_posting(name, j)["jd_raw"]) for j in source.parse_board(payload)]
+    return jds
+
+
+@pytest.mark.parametrize("jd", _seed_jds())
+def test_matcher_agrees_with_per_pattern_search(jd):
+    assert MATCHER.find(jd) == per_pattern(jd)
+
+
+def test_patterns_starting_at_the_same_offset_are_all_found():
+    assert set(MATCHER.find("We use Node.js daily")) == {"node", "javascript"}
+
+
+def test_matcher_without_a_first_character_gate():
+    # a pattern with no literal first character disables the gate; results must not change
+    from src.match.skills import SkillDef, _rx
+
+    catalog = {**CATALOG, "any-digit": SkillDef(1.0, [_rx(r"\d+\+? years")])}
+    matcher = SkillMatcher(catalog)
+    text = "3+ years of Python and SQL on AWS"
+    assert set(matcher.find(text)) == {"python", "sql", "aws", "any-digit"}